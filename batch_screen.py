@@ -0,0 +1,143 @@
+"""Screen a resume folder against a list of questions without the Streamlit UI.
+
+Usage:
+    python batch_screen.py --folder resume/2025-01-24/ISwfEXWb \
+        --questions questions.txt --output answers.jsonl --workers 4
+
+The questions file is plain text (one question per line) or JSON/JSONL
+(a list of strings, or objects with a "question" field). The output format
+follows the output extension: .jsonl or .csv.
+"""
+import argparse
+import csv
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+from utils.snowflake_utils import SnowflakeConnection
+from utils.chat import AppConfig, ChatPipeline
+from utils.governor import get_governor
+from utils.logging_utils import setup_logging
+
+logger = setup_logging()
+
+STAGES = ["route_ms", "rewrite_ms", "retrieve_ms", "ttft_ms", "generate_ms", "total_ms"]
+
+
+def load_questions(path: str) -> List[str]:
+    """Load questions from a text, JSON or JSONL file."""
+    text = Path(path).read_text(encoding="utf-8")
+    if path.endswith(".jsonl"):
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    elif path.endswith(".json"):
+        items = json.loads(text)
+    else:
+        items = text.splitlines()
+    questions = [item["question"] if isinstance(item, dict) else item for item in items]
+    return [q.strip() for q in questions if q and q.strip()]
+
+
+def run_batch(pipeline: ChatPipeline, folder_path: str, questions: List[str], workers: int) -> List[Dict]:
+    """Answer every question with at most `workers` in flight."""
+    def answer_one(index_question):
+        index, question = index_question
+        try:
+            result = pipeline.answer(question, folder_path)
+            error = ""
+        except Exception as e:
+            logger.error(f"Question {index + 1} failed: {str(e)}")
+            result, error = {"answer": "", "sources": [], "retrieval": {}, "timings": {}}, str(e)
+        logger.info(f"Answered {index + 1}/{len(questions)}")
+        return {
+            "question": question,
+            "answer": result["answer"],
+            "sources": sorted({s.get("relative_path", "") for s in result["sources"]} - {""}),
+            "route": result["retrieval"].get("route") or result["retrieval"].get("routing", {}).get("route", ""),
+            "prompt_tokens": result["retrieval"].get("prompt_tokens", 0),
+            "coverage": result["retrieval"].get("coverage", ""),
+            "timings": {k: round(v, 1) for k, v in result["timings"].items()},
+            "error": error
+        }
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(answer_one, enumerate(questions)))
+
+
+def write_results(results: List[Dict], path: str) -> None:
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(
+                f, fieldnames=["question", "answer", "sources", "route", "prompt_tokens",
+                               "coverage", "error"] + STAGES)
+            writer.writeheader()
+            for r in results:
+                writer.writerow({
+                    "question": r["question"],
+                    "answer": r["answer"],
+                    "sources": ";".join(r["sources"]),
+                    "route": r["route"],
+                    "prompt_tokens": r["prompt_tokens"],
+                    "coverage": r["coverage"],
+                    "error": r["error"],
+                    **{stage: r["timings"].get(stage, "") for stage in STAGES}
+                })
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps(r) + "\n")
+
+
+def summarize(results: List[Dict], elapsed: float) -> Dict:
+    """Throughput, per-stage latency, prompt token and coverage statistics."""
+    summary = {
+        "questions": len(results),
+        "errors": sum(1 for r in results if r["error"]),
+        "elapsed_s": round(elapsed, 1),
+        "questions_per_min": round(len(results) / elapsed * 60, 1) if elapsed else 0.0,
+    }
+    for stage in STAGES:
+        values = sorted(r["timings"][stage] for r in results if stage in r["timings"])
+        if values:
+            summary[stage] = percentiles(values)
+    tokens = sorted(r["prompt_tokens"] for r in results if r["prompt_tokens"])
+    if tokens:
+        summary["prompt_tokens"] = percentiles(tokens)
+    coverage = [r["coverage"] for r in results if r["coverage"] != ""]
+    if coverage:
+        summary["mean_coverage"] = round(statistics.mean(coverage), 3)
+    return summary
+
+
+def percentiles(values: List[float]) -> Dict:
+    return {
+        "p50": round(statistics.median(values), 1),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 1),
+        "max": values[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless resume screening")
+    parser.add_argument("--folder", required=True, help="Folder path, e.g. resume/<date>/<batch_id>")
+    parser.add_argument("--questions", required=True, help="Questions file (.txt, .json or .jsonl)")
+    parser.add_argument("--output", default="answers.jsonl", help="Output file (.jsonl or .csv)")
+    parser.add_argument("--workers", type=int, default=4, help="Maximum concurrent questions")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    pipeline = ChatPipeline(SnowflakeConnection.get_connection(), AppConfig())
+
+    start = time.perf_counter()
+    results = run_batch(pipeline, args.folder.strip("/"), questions, max(1, args.workers))
+    summary = summarize(results, time.perf_counter() - start)
+    summary["cortex"] = get_governor().metrics()
+
+    write_results(results, args.output)
+    logger.info(f"Wrote {len(results)} answers to {args.output}")
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
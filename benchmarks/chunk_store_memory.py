@@ -0,0 +1,97 @@
+"""Memory benchmark: per-session source documents vs the shared chunk store.
+
+Simulates SESSIONS concurrent chat sessions of TURNS turns each, every turn
+retrieving 10 chunks from a shared folder, and reports server RSS for:
+
+- inline: each message keeps its own JSON copy of the search response
+  (the previous ``source_documents`` behaviour)
+- store:  each message keeps chunk ids into the process-wide ChunkStore
+
+Each measurement runs in a fresh interpreter so RSS is not polluted by
+earlier runs. Usage:
+
+    python -m benchmarks.chunk_store_memory [--sessions 1 10 50] [--turns 10 50]
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+
+CHUNK_CHARS = 1500
+FOLDER_CHUNKS = 400
+RESULTS_PER_TURN = 10
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def simulate(mode: str, sessions: int, turns: int) -> dict:
+    from utils.chunk_store import ChunkRefs, ChunkStore
+
+    rng = random.Random(0)
+    folder = [
+        {"chunk": "".join(rng.choices("abcdefghij ", k=CHUNK_CHARS)),
+         "relative_path": f"resume/2025-01-01/bench/{i % 40}.pdf"}
+        for i in range(FOLDER_CHUNKS)
+    ]
+    store = ChunkStore()
+    baseline = rss_mb()
+
+    all_sessions = []
+    for _ in range(sessions):
+        messages = []
+        refs = ChunkRefs(store)
+        for _ in range(turns):
+            results = rng.sample(folder, RESULTS_PER_TURN)
+            if mode == "inline":
+                source = json.loads(json.dumps({"results": results}))
+                messages.append({"role": "assistant", "content": "answer",
+                                 "source_documents": json.dumps(source)})
+            else:
+                messages.append({"role": "assistant", "content": "answer",
+                                 "source_refs": {"chunk_ids": refs.add(results)}})
+        all_sessions.append((messages, refs))
+
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "turns": turns,
+        "rss_delta_mb": round(rss_mb() - baseline, 1),
+        "store": store.stats() if mode == "store" else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, sessions, turns = args.child
+        print(json.dumps(simulate(mode, int(sessions), int(turns))))
+        return
+
+    print(f"{'sessions':>8} {'turns':>6} {'inline MB':>10} {'store MB':>9}")
+    for sessions in args.sessions:
+        for turns in args.turns:
+            row = {}
+            for mode in ("inline", "store"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.chunk_store_memory",
+                     "--child", mode, str(sessions), str(turns)],
+                    capture_output=True, text=True, check=True
+                ).stdout
+                row[mode] = json.loads(out)["rss_delta_mb"]
+            print(f"{sessions:>8} {turns:>6} {row['inline']:>10} {row['store']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Local stand-in for Snowflake, Cortex Search and Cortex COMPLETE.
+
+Used by the load test to drive the real app code without a Snowflake
+account. Every call sleeps for a configurable latency so that queueing in
+the app (governor, thread pools, caches) behaves like it does against the
+real services. The stand-in understands only the SQL the app issues.
+"""
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List
+from unittest import mock
+
+SKILLS = ["Python", "SQL", "Spark", "AWS", "Snowflake", "Airflow", "dbt", "Kafka",
+          "Docker", "Kubernetes", "React", "Java", "Tableau", "Terraform"]
+FIRST_NAMES = ["Alex", "Sam", "Priya", "Chen", "Maria", "Omar", "Lena", "Raj", "Ana", "Tom"]
+LAST_NAMES = ["Smith", "Patel", "Garcia", "Nguyen", "Kim", "Okafor", "Rossi", "Khan"]
+CHUNK_CHARS = 1500
+NAME_PATTERN = re.compile(r"Name: ([A-Z][a-z]+ [A-Z][a-z]+)")
+WORD_PATTERN = re.compile(r"\w+")
+
+
+@dataclass
+class FakeLatency:
+    """Simulated service latencies in milliseconds"""
+    SQL_MS: float = 40
+    PUT_MS: float = 300
+    SEARCH_MS: float = 150
+    TTFT_MS: float = 600
+    TOKEN_MS: float = 15
+    ANSWER_TOKENS: int = 120
+
+
+def resume_text(index: int) -> str:
+    """Deterministic synthetic resume for candidate `index`."""
+    name = f"{FIRST_NAMES[index % len(FIRST_NAMES)]} {LAST_NAMES[index % len(LAST_NAMES)]}"
+    skills = [SKILLS[(index * 3 + k) % len(SKILLS)] for k in range(4 + index % 3)]
+    years = 1 + index % 12
+    lines = [f"Name: {name}", f"Experience: {years} years", "Skills: " + ", ".join(skills)]
+    for project in range(2 + index % 4):
+        lines.append(
+            f"Project {project + 1}: built a {skills[project % len(skills)]} pipeline "
+            f"processing {10 * (project + 1)}M events a day, cutting cost by {5 + project * 7}% "
+            f"and latency by {20 + project}ms for {name.split()[0]}'s team.")
+    lines.append("Summary: " + " ".join(
+        f"Delivered {skill} work across analytics and platform teams." for skill in skills) * 3)
+    return "\n".join(lines)
+
+
+class FakeRow(dict):
+    """Row addressable by column name or position, like a Snowpark Row."""
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self.values())[key]
+        return super().__getitem__(key)
+
+
+class FakeResult:
+    def __init__(self, rows: List[FakeRow]):
+        self.rows = rows
+
+    def collect(self) -> List[FakeRow]:
+        return self.rows
+
+
+class FakeSession:
+    """In-memory chunk table answering the app's SQL statements."""
+
+    def __init__(self, latency: FakeLatency):
+        self.latency = latency
+        self.chunks: Dict[str, List[str]] = {}
+        self.summaries: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def load_folder(self, folder_path: str, first: int, count: int) -> List[str]:
+        """Pre-ingest `count` synthetic resumes into a folder."""
+        paths = []
+        for i in range(first, first + count):
+            path = f"{folder_path}/candidate_{i}.txt"
+            self.add_chunks(path, chunk_text(resume_text(i)))
+            self.summaries[path] = fake_summary(resume_text(i))
+            paths.append(path)
+        return paths
+
+    def add_chunks(self, relative_path: str, chunks: List[str]) -> None:
+        with self._lock:
+            self.chunks.setdefault(relative_path, []).extend(chunks)
+
+    def rows_for(self, paths: List[str]) -> List[Dict]:
+        with self._lock:
+            return [{"chunk": chunk, "relative_path": path}
+                    for path in paths for chunk in self.chunks.get(path, [])]
+
+    def summary_rows_for(self, paths: List[str]) -> List[Dict]:
+        with self._lock:
+            return [{"summary": self.summaries[path], "relative_path": path}
+                    for path in paths if path in self.summaries]
+
+    def sql(self, query: str, params: List = None) -> FakeResult:
+        text = " ".join(query.split())
+        upper = text.upper()
+        if upper.startswith("PUT "):
+            time.sleep(self.latency.PUT_MS / 1000)
+            return FakeResult([])
+        time.sleep(self.latency.SQL_MS / 1000)
+
+        if "TEXT_CHUNKER" in upper:
+            return FakeResult([FakeRow(CHUNK=c) for c in chunk_text(params[0])])
+        if upper.startswith("INSERT INTO RESUME_SUMMARIES"):
+            with self._lock:
+                self.summaries[params[0]] = params[1]
+            return FakeResult([])
+        if upper.startswith("INSERT INTO"):
+            path = re.search(r"relative_path = '([^']+)'", text).group(1)
+            self.add_chunks(path, json.loads(params[0]))
+            return FakeResult([])
+        if "SNOWFLAKE.CORTEX.COMPLETE" in upper:
+            return FakeResult([FakeRow(RESPONSE=fake_complete("", text, latency=self.latency))])
+        if upper.startswith("SELECT DISTINCT RELATIVE_PATH"):
+            prefix = re.search(r"LIKE '([^%']*)%'", text).group(1)
+            with self._lock:
+                paths = sorted(p for p in self.chunks if p.startswith(prefix))
+            return FakeResult([FakeRow(RELATIVE_PATH=p) for p in paths])
+        if upper.startswith("DELETE FROM"):
+            prefix = re.search(r"LIKE '([^%']*)%'", text).group(1)
+            table = self.summaries if "RESUME_SUMMARIES" in upper else self.chunks
+            with self._lock:
+                for path in [p for p in table if p.startswith(prefix)]:
+                    del table[path]
+            return FakeResult([])
+        # ALTER / REMOVE / retention reports: nothing to return
+        return FakeResult([])
+
+
+class FakeSearchResponse:
+    def __init__(self, results: List[Dict]):
+        self.results = results
+
+
+class FakeSearchService:
+    """Cortex Search stand-in: word-overlap ranking over the fake chunk or summary table."""
+
+    def __init__(self, session: FakeSession, summaries: bool = False):
+        self.session = session
+        self.summaries = summaries
+
+    def search(self, query: str, columns: List[str], filter: Dict = None, limit: int = 10):
+        time.sleep(self.session.latency.SEARCH_MS / 1000)
+        paths = filter_paths(filter)
+        rows = self.session.summary_rows_for(paths) if self.summaries else self.session.rows_for(paths)
+        text_column = "summary" if self.summaries else "chunk"
+        terms = set(WORD_PATTERN.findall(query.lower()))
+        rows.sort(key=lambda r: -len(terms & set(WORD_PATTERN.findall(r[text_column].lower()))))
+        return FakeSearchResponse(
+            [{c: r[c.lower()] for c in columns if c.lower() in r} for r in rows[:limit]])
+
+
+class FakeRoot:
+    """snowflake.core.Root stand-in: every database/schema/service resolves to the fake."""
+
+    def __init__(self, session: FakeSession):
+        self.databases = _Catalog(session)
+
+
+class _Catalog:
+    def __init__(self, session: FakeSession):
+        self.session = session
+
+    def __getitem__(self, name: str) -> "_Catalog":
+        return self
+
+    @property
+    def schemas(self) -> "_Catalog":
+        return self
+
+    @property
+    def cortex_search_services(self) -> "_Services":
+        return _Services(self.session)
+
+
+class _Services:
+    def __init__(self, session: FakeSession):
+        self.session = session
+
+    def __getitem__(self, name: str) -> FakeSearchService:
+        return FakeSearchService(self.session, summaries="summary" in name)
+
+
+class FakeConnection:
+    def __init__(self, session: FakeSession):
+        self._session = session
+
+    def session(self) -> FakeSession:
+        return self._session
+
+
+def chunk_text(text: str) -> List[str]:
+    return [text[i:i + CHUNK_CHARS] for i in range(0, len(text or ""), CHUNK_CHARS)] or [""]
+
+
+def filter_paths(search_filter: Dict) -> List[str]:
+    if not search_filter:
+        return []
+    if "@or" in search_filter:
+        return [p for f in search_filter["@or"] for p in filter_paths(f)]
+    return [search_filter.get("@eq", {}).get("RELATIVE_PATH", "")]
+
+
+def fake_insights(prompt: str) -> str:
+    """Insights JSON for the candidates named in the prompt's context."""
+    names = list(dict.fromkeys(NAME_PATTERN.findall(prompt)))
+    candidates = []
+    for i, name in enumerate(names):
+        candidates.append({
+            "name": name,
+            "experience": 1 + i % 12,
+            "projects": 2 + i % 4,
+            "skills": [SKILLS[(i * 3 + k) % len(SKILLS)] for k in range(4)],
+            "key_achievements": f"{name} shipped pipelines processing 40M events a day.",
+            "ai_take": "Good fit for Data Engineer roles."
+        })
+    skills = {}
+    for candidate in candidates:
+        for skill in candidate["skills"]:
+            skills[skill] = skills.get(skill, 0) + 1
+    return json.dumps({
+        "total_candidates": len(candidates),
+        "skills": skills,
+        "average_experience": sum(c["experience"] for c in candidates) / max(1, len(candidates)),
+        "total_projects": sum(c["projects"] for c in candidates),
+        "candidates": candidates
+    })
+
+
+def fake_summary(resume: str) -> str:
+    """Summary record in the shape the ingest prompt asks for."""
+    lines = resume.splitlines()
+    return "\n".join(lines[:3] + ["Roles: Data Engineer", "Highlights: " + lines[3][:160]])
+
+
+def fake_complete(model: str, prompt: str, session=None, stream: bool = False,
+                  latency: FakeLatency = None):
+    """snowflake.cortex.complete stand-in with time-to-first-token and per-token delay."""
+    latency = latency or getattr(session, "latency", None) or FakeLatency()
+    if "structured insights in JSON" in prompt:
+        tokens = re.findall(r"\S+\s*", fake_insights(prompt))
+    elif "<resume>" in prompt:
+        resume = prompt.split("<resume>")[1].split("</resume>")[0].strip()
+        tokens = re.findall(r"\S+\s*", fake_summary(resume))
+    else:
+        tokens = [f"token{i} " for i in range(latency.ANSWER_TOKENS)]
+
+    def generate() -> Iterator[str]:
+        time.sleep(latency.TTFT_MS / 1000)
+        for token in tokens:
+            time.sleep(latency.TOKEN_MS / 1000)
+            yield token
+
+    if stream:
+        return generate()
+    return "".join(generate())
+
+
+def install(latency: FakeLatency) -> FakeSession:
+    """Route the app's Snowflake and Cortex entry points to the stand-in.
+
+    Must run before any `utils` module is imported, since they bind
+    `Root` and `complete` at import time.
+    """
+    import streamlit as st
+
+    session = FakeSession(latency)
+    for patch in (
+        mock.patch("snowflake.core.Root", FakeRoot),
+        mock.patch("snowflake.cortex.complete", fake_complete),
+        mock.patch.object(st, "connection", lambda name, **kwargs: FakeConnection(session)),
+    ):
+        patch.start()
+    return session
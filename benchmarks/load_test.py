@@ -0,0 +1,221 @@
+"""Load test: concurrent recruiter sessions against one server process.
+
+Drives SESSIONS simulated recruiters at once through the real app scripts
+with Streamlit's AppTest. Each session uploads a batch of resumes, asks
+TURNS chat questions in main.py and opens the Auto Insights page. Snowflake,
+Cortex Search and Cortex COMPLETE are replaced by the latency-configurable
+stand-in in benchmarks/fake_snowflake.py, so the numbers measure the app's
+own queueing, caching and memory, not the network.
+
+Each session count runs in a fresh interpreter so caches and RSS start
+clean. Reports throughput, per-action latency percentiles and RSS for each
+session count. Usage:
+
+    python -m benchmarks.load_test [--sessions 1 5 10 25] [--turns 3] \
+        [--ttft-ms 600] [--token-ms 15] [--search-ms 150] [--output load.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Dict, List
+
+from benchmarks.fake_snowflake import FakeLatency, install, resume_text
+
+SECRETS = {"DATABASE": "LOADTEST", "SCHEMA": "PUBLIC"}
+SAMPLE_FOLDER = "resume/2025-01-24/ISwfEXWb"
+QUESTIONS = [
+    "Who has the most experience with Python?",
+    "Which candidates have worked with Spark and AWS?",
+    "Summarize the strongest data engineering projects.",
+    "Who would be a good fit for a platform engineer role?",
+    "Compare the Snowflake experience of the candidates.",
+]
+ACTIONS = ["upload", "chat_open", "chat_turn", "insights"]
+SCRIPT_TIMEOUT = 300
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def upload_script(file_names, texts):
+    """Runs inside AppTest: upload one batch like the Upload Resumes button does."""
+    import streamlit as st
+    from utils.shared import upload_to_snowflake
+    st.session_state.setdefault("uploaded_files", [])
+    for file_name, text in zip(file_names, texts):
+        upload_to_snowflake(file_name, text.encode("utf-8"))
+
+
+def new_app(script, args=(), **session_state):
+    """AppTest for a page file or an inline script function, with fake secrets."""
+    from streamlit.testing.v1 import AppTest
+
+    if callable(script):
+        at = AppTest.from_function(script, default_timeout=SCRIPT_TIMEOUT, args=args)
+    else:
+        at = AppTest.from_file(script, default_timeout=SCRIPT_TIMEOUT)
+    for key, value in SECRETS.items():
+        at.secrets[key] = value
+    for key, value in session_state.items():
+        at.session_state[key] = value
+    return at
+
+
+def timed(action: str, samples: List, fn) -> None:
+    start = time.perf_counter()
+    error = ""
+    try:
+        at = fn()
+        if at is not None and at.exception:
+            error = at.exception[0].message
+    except Exception as e:
+        error = str(e)
+    samples.append({"action": action, "ms": (time.perf_counter() - start) * 1000, "error": error})
+
+
+def simulate_session(index: int, turns: int, resumes: int) -> List[Dict]:
+    """One recruiter: upload, open chat, ask questions, view insights."""
+    samples = []
+    names = [f"candidate_{index}_{i}.txt" for i in range(resumes)]
+    texts = [resume_text(index * resumes + i) for i in range(resumes)]
+
+    uploader = new_app(upload_script, args=(names, texts))
+    timed("upload", samples, lambda: uploader.run())
+    if "folder_path" in uploader.session_state:
+        folder_path = uploader.session_state["folder_path"]
+        uploaded_files = list(uploader.session_state["uploaded_files"])
+    else:
+        # Upload failed (already recorded); keep the session going on the sample folder
+        folder_path, uploaded_files = SAMPLE_FOLDER, []
+    state = {"chat_mode": True, "indexing": False,
+             "folder_path": folder_path, "uploaded_files": uploaded_files}
+
+    chat = new_app("main.py", **state)
+    timed("chat_open", samples, lambda: chat.run())
+    for turn in range(turns):
+        question = QUESTIONS[(index + turn) % len(QUESTIONS)]
+        timed("chat_turn", samples, lambda: chat.chat_input[0].set_value(question).run())
+
+    insights = new_app("pages/auto_insights.py", **state)
+    timed("insights", samples, lambda: insights.run())
+    return samples
+
+
+def percentiles(values: List[float]) -> Dict:
+    values = sorted(values)
+    return {
+        "p50": round(statistics.median(values), 1),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 1),
+        "max": round(values[-1], 1),
+    }
+
+
+def run_level(sessions: int, turns: int, resumes: int, latency: FakeLatency) -> Dict:
+    """Run `sessions` concurrent recruiters in this process and summarize."""
+    session = install(latency)
+    session.load_folder(SAMPLE_FOLDER, 0, resumes)
+
+    # One session alone first: imports the app modules (which read secrets at
+    # import time) before concurrent AppTests start swapping st.secrets.
+    primer = new_app("main.py", chat_mode=True, indexing=False, folder_path=SAMPLE_FOLDER)
+    primer.run()
+
+    peak = {"rss": rss_mb()}
+    baseline = peak["rss"]
+    stopped = threading.Event()
+
+    def sample_memory():
+        while not stopped.wait(0.2):
+            peak["rss"] = max(peak["rss"], rss_mb())
+
+    sampler = threading.Thread(target=sample_memory, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(
+            lambda i: simulate_session(i + 1, turns, resumes), range(sessions)))
+    elapsed = time.perf_counter() - start
+    stopped.set()
+    sampler.join()
+
+    samples = [s for r in results for s in r]
+    summary = {
+        "sessions": sessions,
+        "elapsed_s": round(elapsed, 1),
+        "chat_turns_per_min": round(
+            sum(1 for s in samples if s["action"] == "chat_turn") / elapsed * 60, 1),
+        "errors": sum(1 for s in samples if s["error"]),
+        "rss_baseline_mb": round(baseline, 1),
+        "rss_peak_mb": round(peak["rss"], 1),
+        "rss_per_session_mb": round((peak["rss"] - baseline) / sessions, 2),
+    }
+    for action in ACTIONS:
+        values = [s["ms"] for s in samples if s["action"] == action and not s["error"]]
+        if values:
+            summary[action] = percentiles(values)
+    first_errors = sorted({s["error"] for s in samples if s["error"]})[:3]
+    if first_errors:
+        summary["sample_errors"] = first_errors
+
+    from utils.governor import get_governor
+    summary["cortex"] = get_governor().metrics()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent session load test")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 25])
+    parser.add_argument("--turns", type=int, default=3, help="Chat questions per session")
+    parser.add_argument("--resumes", type=int, default=5, help="Resumes uploaded per session")
+    parser.add_argument("--sql-ms", type=float, default=FakeLatency.SQL_MS)
+    parser.add_argument("--search-ms", type=float, default=FakeLatency.SEARCH_MS)
+    parser.add_argument("--ttft-ms", type=float, default=FakeLatency.TTFT_MS)
+    parser.add_argument("--token-ms", type=float, default=FakeLatency.TOKEN_MS)
+    parser.add_argument("--output", help="Write the full results as JSON")
+    parser.add_argument("--level", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    latency = FakeLatency(SQL_MS=args.sql_ms, SEARCH_MS=args.search_ms,
+                          TTFT_MS=args.ttft_ms, TOKEN_MS=args.token_ms)
+
+    if args.level:
+        print(json.dumps(run_level(args.level, args.turns, args.resumes, latency)))
+        return
+
+    rows = []
+    for sessions in args.sessions:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.load_test", "--level", str(sessions),
+             "--turns", str(args.turns), "--resumes", str(args.resumes),
+             "--sql-ms", str(args.sql_ms), "--search-ms", str(args.search_ms),
+             "--ttft-ms", str(args.ttft_ms), "--token-ms", str(args.token_ms)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        rows.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"{'sessions':>8} {'turns/min':>10} {'turn p50':>9} {'turn p95':>9} "
+          f"{'insights p95':>13} {'errors':>7} {'peak MB':>8} {'MB/session':>11}")
+    for r in rows:
+        turn = r.get("chat_turn", {})
+        print(f"{r['sessions']:>8} {r['chat_turns_per_min']:>10} {turn.get('p50', '-'):>9} "
+              f"{turn.get('p95', '-'):>9} {r.get('insights', {}).get('p95', '-'):>13} "
+              f"{r['errors']:>7} {r['rss_peak_mb']:>8} {r['rss_per_session_mb']:>11}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"latency": asdict(latency), "levels": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
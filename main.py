@@ -1,11 +1,14 @@
 import logging
 import streamlit as st
-from utils.shared import append_folder_path, upload_to_snowflake, render_sidebar
+from utils.shared import append_folder_path, upload_to_snowflake, render_sidebar, prompt as insights_prompt
 import time
 from utils.snowflake_utils import SnowflakeConnection
 from utils.ui import UIManager
 from utils.chat import ChatHandler, AppConfig
 from utils.state import SessionStateManager
+from utils.retention import RetentionManager
+from utils.warmup import start_warmup
+from utils.profiling import profile, profiled
 from utils.logging_utils import setup_logging
 
 logger = setup_logging()
@@ -19,6 +22,7 @@ class ATSApplication:
         self.setup_app()
         SessionStateManager.initialize_session_state()
         UIManager.load_css("styles.css")
+        RetentionManager.run_scheduled_purge()
         self.chat_handler = ChatHandler(
             SnowflakeConnection.get_connection(),
             config=self.config
@@ -84,15 +88,9 @@ class ATSApplication:
                         )
 
                         try:
-                            for file in uploaded_files:
-                                file_data = file.read()
-                                upload_to_snowflake(file.name, file_data)
-                                logger.info(
-                                    f"Successfully uploaded {file.name}")
-                                success_messages.markdown(
-                                    f'<div class="success-message">✨ Successfully uploaded {file.name}</div>',
-                                    unsafe_allow_html=True
-                                )
+                            with profiled("upload"):
+                                self._upload_files(
+                                    uploaded_files, success_messages)
 
                             time.sleep(1)
                             success_messages.empty()  # Clear success messages before transition
@@ -102,13 +100,38 @@ class ATSApplication:
                         finally:
                             spinner.empty()
 
+    def _upload_files(self, uploaded_files, success_messages):
+        """Upload each file and report progress"""
+        for file in uploaded_files:
+            file_data = file.read()
+            dedup_report = upload_to_snowflake(file.name, file_data)
+            logger.info(f"Successfully uploaded {file.name}")
+            skipped = (
+                f" ({dedup_report['suppressed']} duplicate chunks skipped)"
+                if dedup_report["suppressed"] else "")
+            success_messages.markdown(
+                f'<div class="success-message">✨ Successfully uploaded {file.name}{skipped}</div>',
+                unsafe_allow_html=True
+            )
+
     def render_chat_ui(self):
         """Render chat interface"""
         self._render_header()
         render_sidebar()
+        self._start_warmup()
         self._display_chat_history()
         self._handle_chat_input()
 
+    def _start_warmup(self):
+        """Precompute insights and common answers once the folder is searchable"""
+        folder_path = st.session_state.get("folder_path")
+        if folder_path and not st.session_state.get("indexing", False):
+            job = start_warmup(folder_path, self.chat_handler.pipeline,
+                               self.config.WARMUP_QUERIES, insights_prompt)
+            if job is not None:
+                # Remembered so Reset cancels only the warm-up this session started
+                st.session_state["warmup_job"] = job
+
     def _render_header(self):
         """Render chat header"""
         st.markdown(f"""
@@ -142,8 +165,9 @@ class ATSApplication:
 
             if message["role"] == "assistant" and not is_welcome_message:
                 with st.expander("📄 View Source Documents"):
-                    if "source_documents" in message and message["source_documents"]:
-                        st.json(message["source_documents"])
+                    source_documents = ChatHandler.get_source_documents(message)
+                    if source_documents:
+                        st.json(source_documents)
                     else:
                         st.info("No source documents available")
 
@@ -202,6 +226,7 @@ class ATSApplication:
             # Process the chat message
             self.chat_handler.process_chat_message(prompt)
 
+    @profile("app_run")
     def run(self):
         """Run the application"""
         try:
@@ -1,12 +1,14 @@
+import time
 import streamlit as st
 import plotly.express as px
-import pandas as pd
-import json
-import re
-from utils.shared import prompt, render_sidebar, get_file_paths
+from utils.shared import prompt, render_sidebar
 from utils.snowflake_utils import SnowflakeConnection
-from utils.chat import AppConfig
 from utils.logging_utils import setup_logging
+from utils.profiles import CandidateProfiles, register_profiles
+from utils.insights import stream_insights
+from utils.json_stream import IncrementalJSONParser
+from utils.priority import interactive_request
+from utils.profiling import profile
 
 st.set_page_config(
     page_title="Resume Analytics",
@@ -15,77 +17,62 @@ st.set_page_config(
 )
 logger = setup_logging()
 
+# Streaming redraws: at most one per interval, plus one per finished top-level field
+RENDER_INTERVAL = 0.25
+
 
 class ResumeAnalytics:
     def __init__(self, folder_path, prompt):
         self.folder_path = folder_path
         self.prompt = prompt
 
-    @st.cache_data
-    def get_ai_insights(_self):
-        """Fetch AI-generated insights using Snowflake Cortex via a SQL query."""
+    def get_ai_insights(_self, on_update):
+        """Stream AI-generated insights from Snowflake Cortex, parsing them as they arrive.
+
+        on_update is called with the partial insights when a top-level field
+        completes, and at most every RENDER_INTERVAL seconds as candidates
+        complete. Responses are cached per folder by stream_insights,
+        which the post-upload warm-up also fills.
+        """
         progress_bar = st.progress(0)
         status_text = st.empty()
 
+        def on_progress(percent, text):
+            progress_bar.progress(percent)
+            status_text.text(text)
+
         try:
             status_text.text("Connecting to database...")
             session = SnowflakeConnection.get_connection()
             progress_bar.progress(20)
 
-            progress_bar.progress(40)
-
-            try:
-                status_text.text("Retrieving resume data...")
-                file_paths = get_file_paths(_self.folder_path)
-                progress_bar.progress(60)
-
-                status_text.text("Analyzing resume contents...")
-                filter_conditions = [
-                    {"@eq": {"RELATIVE_PATH": path}} for path in file_paths]
-                search_response = SnowflakeConnection.get_search_service(
-                    session
-                ).search(
-                    query=_self.prompt,
-                    columns=["chunk"],
-                    filter={
-                        "@or": filter_conditions} if len(filter_conditions) > 1 else filter_conditions[0],
-                    limit=10
-                )
-                progress_bar.progress(80)
-
-                status_text.text("Generating AI insights...")
-                results = search_response.results
-                context_str = "\n".join(
-                    [f"Context document {i+1}: {r['chunk']}" for i,
-                        r in enumerate(results)]
-                )
-
-                no_of_candidates = len(file_paths)
-                base_prompt = (
-                    f"Analyze {no_of_candidates} resumes and provide structured insights in JSON format. "
-                    "The response must be ONLY valid JSON with no additional text or formatting.\n\n" +
-                    _self.prompt
-                )
-
-                sql_query = (
-                    "SELECT SNOWFLAKE.CORTEX.COMPLETE("
-                    f"'{AppConfig.RESPONSE_MODEL}', "
-                    "CONCAT("
-                    f"'{base_prompt}\\n\\nContext from resumes: ', "
-                    f"'{context_str}'"
-                    "))"
-                )
-
-                response = session.sql(sql_query).collect()[0][0]
-
-                progress_bar.progress(100)
-                status_text.empty()
-                progress_bar.empty()
-
-                return response
-
-            finally:
-                pass
+            parser = IncrementalJSONParser()
+            start = time.perf_counter()
+            first_render = None
+            last_render, fields_rendered = 0.0, 0
+            for chunk in stream_insights(
+                    session, _self.folder_path, _self.prompt, on_progress=on_progress):
+                if not parser.feed(chunk):
+                    continue
+                now = time.perf_counter()
+                if len(parser.fields) == fields_rendered and now - last_render < RENDER_INTERVAL:
+                    continue
+                last_render, fields_rendered = now, len(parser.fields)
+                if first_render is None:
+                    first_render = (now - start) * 1000
+                    status_text.empty()
+                    progress_bar.empty()
+                on_update(parser.snapshot())
+            insights = parser.close()
+            logger.info(f"Insights: first section after {first_render or 0:.0f}ms, "
+                        f"complete after {(time.perf_counter() - start) * 1000:.0f}ms")
+
+            status_text.empty()
+            progress_bar.empty()
+
+            if not insights:
+                raise ValueError("No valid JSON object found in response")
+            return insights
 
         except Exception as e:
             status_text.error(f"Error during processing: {str(e)}")
@@ -93,32 +80,25 @@ class ResumeAnalytics:
             logger.error(f"Error during AI insights retrieval: {str(e)}")
             raise e
 
-    @st.cache_data
-    def clean_json_response(_self, response):
-        """Clean the AI response to extract only valid JSON content."""
-        response = re.sub(r'```json\s*', '', response)
-        response = re.sub(r'\s*```', '', response)
-        response = response.strip()
-
-        start_idx = response.find('{')
-        end_idx = response.rfind('}')
+    def get_session_insights(self, on_update):
+        """This folder's insights, streamed once per session.
 
-        if start_idx == -1 or end_idx == -1:
-            logger.error("No valid JSON object found in response")
-            raise ValueError("No valid JSON object found in response")
+        Kept in session state whether or not the reply was complete (only
+        complete replies are cached across sessions), so filter reruns never
+        start another Cortex call. Uploading to the folder drops them.
+        """
+        stored = st.session_state.setdefault("folder_insights", {})
+        if self.folder_path not in stored:
+            stored[self.folder_path] = self.get_ai_insights(on_update)
+        return stored[self.folder_path]
 
-        json_str = response[start_idx:end_idx + 1]
-
-        try:
-            parsed_json = json.loads(json_str)
-            return parsed_json
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON structure: {str(e)}")
-            raise ValueError(f"Invalid JSON structure: {str(e)}")
+    @st.cache_data
+    def build_profiles(_self, insights):
+        """Build the columnar candidate profile table from the insights JSON."""
+        return CandidateProfiles.from_insights(insights)
 
     @st.cache_data
-    def create_skills_chart(_self, skills):
-        skill_df = pd.DataFrame(skills.items(), columns=["Skill", "Count"])
+    def create_skills_chart(_self, skill_df):
         skill_df = skill_df.nlargest(
             8, "Count").sort_values("Count", ascending=True)
 
@@ -143,10 +123,10 @@ class ResumeAnalytics:
 
     @st.cache_data
     def create_experience_chart(_self, candidates):
-        experience_data = {c["name"]: c["experience"] for c in candidates}
         fig = px.pie(
-            names=list(experience_data.keys()),
-            values=list(experience_data.values()),
+            candidates,
+            names="name",
+            values="experience",
             title="Experience Distribution",
             color_discrete_sequence=px.colors.sequential.Blues
         )
@@ -160,12 +140,12 @@ class ResumeAnalytics:
 
     @st.cache_data
     def create_projects_chart(_self, candidates):
-        project_data = {c["name"]: c["projects"] for c in candidates}
         fig = px.bar(
-            x=list(project_data.keys()),
-            y=list(project_data.values()),
+            candidates,
+            x="name",
+            y="projects",
             title="Projects per Candidate",
-            color=list(project_data.values()),
+            color="projects",
             color_continuous_scale="Blues"
         )
         fig.update_layout(
@@ -181,56 +161,142 @@ class ResumeAnalytics:
         )
         return fig
 
-    def display_resume_analytics(self):
-        st.title("Resume Analytics Dashboard")
-
-        render_sidebar()
-
-        st.markdown("<br>", unsafe_allow_html=True)
+    @staticmethod
+    def render_filters(profiles):
+        """Render skill and experience facet filters and apply them."""
+        with st.sidebar:
+            st.markdown(
+                '<h3 class="sidebar-title">Filters</h3>',
+                unsafe_allow_html=True
+            )
+            skills = st.multiselect(
+                "Skills", profiles.skill_vocabulary(), key="skill_filter")
+            low, high = profiles.experience_range()
+            experience = None
+            if high > low:
+                experience = st.slider(
+                    "Experience (years)", low, high, (low, high), key="experience_filter")
+        return profiles.filter(skills=skills, experience=experience)
+
+    @staticmethod
+    def create_sections():
+        """Placeholders for each dashboard section, filled as data arrives."""
         col1, spacer1, col2, spacer2, col3 = st.columns([1, 0.2, 1, 0.2, 1])
-
-        try:
-            ai_insights = self.get_ai_insights()
-            insights = self.clean_json_response(ai_insights)
-
-            col1.metric("Total Candidates",
-                        insights.get("total_candidates", 0))
-            col2.metric("Average Experience (Years)",
-                        round(insights.get("average_experience", 0), 1))
-            col3.metric("Total Projects", insights.get("total_projects", 0))
-
-            st.markdown("<br>", unsafe_allow_html=True)
-            st.plotly_chart(self.create_skills_chart(
-                insights.get("skills", {})), use_container_width=True)
-
-            st.markdown("<br>", unsafe_allow_html=True)
-            cols = st.columns([1, 0.1, 1])
-            cols[0].plotly_chart(self.create_experience_chart(
-                insights.get("candidates", [])), use_container_width=True)
-            cols[2].plotly_chart(self.create_projects_chart(
-                insights.get("candidates", [])), use_container_width=True)
-
-            candidates = insights.get("candidates", [])
-
+        sections = {"metrics": [col1.empty(), col2.empty(), col3.empty()], "version": 0,
+                    "drawn": {}}
+        st.markdown("<br>", unsafe_allow_html=True)
+        sections["skills"] = st.empty()
+        st.markdown("<br>", unsafe_allow_html=True)
+        cols = st.columns([1, 0.1, 1])
+        sections["experience"] = cols[0].empty()
+        sections["projects"] = cols[2].empty()
+        sections["cards"] = st.empty()
+        return sections
+
+    @staticmethod
+    def changed(sections, name, signature):
+        """Whether a section's data differs from what it last drew."""
+        if sections["drawn"].get(name) == signature:
+            return False
+        sections["drawn"][name] = signature
+        return True
+
+    def render_sections(self, sections, metrics, skill_counts, candidates):
+        """Render whichever sections have data and clear the rest.
+
+        Charts and cards are only redrawn when their data changed since the
+        last render into these placeholders.
+        """
+        # Charts are redrawn into the same placeholders, so each draw needs its own key
+        sections["version"] += 1
+        version = sections["version"]
+
+        labels = [("total_candidates", "Total Candidates"),
+                  ("average_experience", "Average Experience (Years)"),
+                  ("total_projects", "Total Projects")]
+        for slot, (key, label) in zip(sections["metrics"], labels):
+            if key in metrics:
+                value = metrics[key]
+                if key == "average_experience":
+                    value = round(float(value), 1)
+                slot.metric(label, value)
+
+        skills = None if skill_counts is None else tuple(skill_counts.itertuples(index=False))
+        if self.changed(sections, "skills", skills):
+            if skills:
+                sections["skills"].plotly_chart(
+                    self.create_skills_chart(skill_counts),
+                    use_container_width=True, key=f"skills_chart_{version}")
+            else:
+                sections["skills"].empty()
+
+        if not self.changed(sections, "candidates", tuple(candidates["candidate_id"])):
+            return
+        if candidates.empty:
+            for name in ("experience", "projects", "cards"):
+                sections[name].empty()
+            return
+        sections["experience"].plotly_chart(
+            self.create_experience_chart(candidates),
+            use_container_width=True, key=f"experience_chart_{version}")
+        sections["projects"].plotly_chart(
+            self.create_projects_chart(candidates),
+            use_container_width=True, key=f"projects_chart_{version}")
+
+        with sections["cards"].container():
             st.subheader("Key Achievements")
-            for candidate in candidates:
+            for candidate in candidates.itertuples():
                 st.markdown(f"""
                     <div class='section-card'>
-                        <div class='candidate-name'>{candidate['name']}</div>
-                        <p>{candidate['key_achievements']}</p>
+                        <div class='candidate-name'>{candidate.name}</div>
+                        <p>{candidate.key_achievements}</p>
                     </div>
                 """, unsafe_allow_html=True)
 
             st.markdown("<br>", unsafe_allow_html=True)
             st.subheader("AI Assessment")
-            for candidate in candidates:
+            for candidate in candidates.itertuples():
                 st.markdown(f"""
                     <div class='section-card'>
-                        <div class='candidate-name'>{candidate['name']}</div>
-                        <p>{candidate['ai_take']}</p>
+                        <div class='candidate-name'>{candidate.name}</div>
+                        <p>{candidate.ai_take}</p>
                     </div>
                 """, unsafe_allow_html=True)
 
+    def render_partial(self, sections, insights):
+        """Render the fields of a still-streaming response that are complete so far."""
+        partial = CandidateProfiles.from_insights(insights)
+        metrics = {key: insights[key] for key in (
+            "total_candidates", "average_experience", "total_projects") if key in insights}
+        skill_counts = partial.skill_counts(pool_only=True) if "skills" in insights else None
+        self.render_sections(sections, metrics, skill_counts, partial.candidates)
+
+    @profile("resume_analytics")
+    def display_resume_analytics(self):
+        st.title("Resume Analytics Dashboard")
+
+        render_sidebar()
+
+        st.markdown("<br>", unsafe_allow_html=True)
+        sections = self.create_sections()
+
+        try:
+            with interactive_request():
+                insights = self.get_session_insights(
+                    lambda partial: self.render_partial(sections, partial))
+            profiles = self.build_profiles(insights)
+            register_profiles(self.folder_path, profiles)
+            filtered = self.render_filters(profiles)
+
+            if profiles.candidates.empty:
+                metrics = {key: insights.get(key, 0) for key in (
+                    "total_candidates", "average_experience", "total_projects")}
+            else:
+                metrics = filtered.metrics()
+
+            self.render_sections(
+                sections, metrics, filtered.skill_counts(), filtered.candidates)
+
         except Exception as e:
             st.error(f"Error processing data: {str(e)}")
             logger.error(f"Error displaying resume analytics: {str(e)}")
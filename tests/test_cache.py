@@ -0,0 +1,12 @@
+from utils.cache import TTLCache
+
+
+def test_evict_folder_keeps_other_folders():
+    cache = TTLCache()
+    cache.set(("resume/a", "question", False), 1)
+    cache.set(("resume/a", "prompt"), 2)
+    cache.set(("resume/b", "question", False), 3)
+    cache.evict_folder("resume/a")
+    assert cache.get(("resume/a", "question", False)) is None
+    assert cache.get(("resume/a", "prompt")) is None
+    assert cache.get(("resume/b", "question", False)) == 3
@@ -0,0 +1,65 @@
+from utils.dedup import ChunkDeduplicator, LSHIndex
+
+FOLDER = "resume/2025-01-01/batch"
+
+
+def chunk(n: int) -> str:
+    """Distinct synthetic chunk number n."""
+    return " ".join(f"word{n}_{i} term{n * 7 + i}" for i in range(40))
+
+
+def test_uncommitted_chunks_do_not_suppress_a_retry():
+    dedup = ChunkDeduplicator()
+    chunks = [chunk(1), chunk(2)]
+    kept, report, pending = dedup.filter(FOLDER, f"{FOLDER}/a.pdf", chunks)
+    assert kept == chunks
+    # The insert failed, so nothing was committed; the retry keeps everything
+    kept, report, pending = dedup.filter(FOLDER, f"{FOLDER}/a.pdf", chunks)
+    assert kept == chunks and report["suppressed"] == 0
+
+    dedup.commit(FOLDER, report, pending)
+    kept, report, _ = dedup.filter(FOLDER, f"{FOLDER}/b.pdf", chunks)
+    assert kept == [] and report["suppressed"] == 2
+
+
+def near_duplicate(text: str) -> str:
+    """The same chunk with its last word changed."""
+    return text.rsplit(" ", 1)[0] + " changed"
+
+
+def test_near_duplicates_within_a_file_are_suppressed():
+    dedup = ChunkDeduplicator()
+    original = chunk(3)
+    kept, report, _ = dedup.filter(FOLDER, f"{FOLDER}/a.pdf", [original, chunk(4), near_duplicate(original)])
+    assert kept == [original, chunk(4)]
+    assert report["links"] == [{"chunk": 2, "duplicate_of": (f"{FOLDER}/a.pdf", 0)}]
+
+
+def test_near_duplicates_across_files_are_suppressed_and_distinct_chunks_kept():
+    dedup = ChunkDeduplicator()
+    kept, report, pending = dedup.filter(FOLDER, f"{FOLDER}/a.pdf", [chunk(5), chunk(6)])
+    dedup.commit(FOLDER, report, pending)
+
+    kept, report, _ = dedup.filter(FOLDER, f"{FOLDER}/b.pdf", [near_duplicate(chunk(6)), chunk(7)])
+    assert kept == [chunk(7)]
+    assert report["links"] == [{"chunk": 0, "duplicate_of": (f"{FOLDER}/a.pdf", 1)}]
+    assert report["batch_dedup_ratio"] == 0.25
+
+    # Other batches are indexed separately
+    kept, _, _ = dedup.filter("resume/2025-01-01/other", "resume/2025-01-01/other/c.pdf", [chunk(6)])
+    assert kept == [chunk(6)]
+
+
+def test_index_survives_rehash_and_growth():
+    dedup = ChunkDeduplicator()
+    index = LSHIndex(dedup.config, capacity=2)
+    signatures = [dedup.hasher.signature(chunk(n)) for n in range(50)]
+    slots = len(index.slot_keys)
+    for n, signature in enumerate(signatures):
+        index.add(signature, index.band_keys(signature), ("file", n))
+    assert len(index.signatures) > 2 and len(index.slot_keys) > slots
+
+    for n, signature in enumerate(signatures):
+        assert index.labels[index.query(signature, index.band_keys(signature))] == ("file", n)
+    near = dedup.hasher.signature(near_duplicate(chunk(20)))
+    assert index.labels[index.query(near, index.band_keys(near))] == ("file", 20)
@@ -0,0 +1,159 @@
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+from utils.governor import CortexGovernor, GovernorConfig
+from utils.priority import background_work, interactive_request
+
+MODEL = "test-model"
+
+
+@pytest.fixture
+def governor():
+    return CortexGovernor(GovernorConfig(
+        REQUESTS_PER_SECOND=1000, BURST=1000, MAX_CONCURRENCY=4, BACKOFF_BASE=0.001))
+
+
+def slow_stream(opened, text="abcdef", delay=0.02):
+    """Stream factory that counts upstream opens."""
+    def fn():
+        opened.append(1)
+
+        def generate():
+            for c in text:
+                time.sleep(delay)
+                yield c
+        return generate()
+    return fn
+
+
+def run_threads(targets):
+    threads = [threading.Thread(target=t) for t in targets]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+
+def assert_idle(governor):
+    metrics = governor.metrics()
+    assert metrics["coalescing_keys"] == 0
+    assert metrics["models"][MODEL]["in_flight"] == 0
+
+
+def test_concurrent_keyed_streams_share_one_upstream_call(governor):
+    opened, results = [], []
+    fn = slow_stream(opened)
+    run_threads([lambda: results.append("".join(governor.stream(MODEL, fn, key="k")))] * 5)
+    assert results == ["abcdef"] * 5
+    assert len(opened) == 1
+    assert governor.metrics()["coalesced"] == 4
+    assert_idle(governor)
+
+
+def test_keyed_call_joins_a_stream(governor):
+    opened, results = [], []
+    stream = governor.stream(MODEL, slow_stream(opened), key="k")
+    assert next(stream) == "a"
+    run_threads([lambda: results.append(governor.call(MODEL, lambda: "not called", key="k"))])
+    assert results == ["abcdef"]
+    assert "".join(stream) == "bcdef"
+    assert len(opened) == 1
+    assert_idle(governor)
+
+
+def test_keyed_stream_joins_a_call(governor):
+    calls, results = [], []
+    started = threading.Event()
+
+    def call():
+        def fn():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return "whole"
+        results.append(governor.call(MODEL, fn, key="k"))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    assert list(governor.stream(MODEL, slow_stream([]), key="k")) == ["whole"]
+    leader.join(5)
+    assert results == ["whole"] and len(calls) == 1
+    assert_idle(governor)
+
+
+def test_abandoned_stream_releases_its_slot_and_key(governor):
+    opened = []
+    stream = governor.stream(MODEL, slow_stream(opened), key="k")
+    assert next(stream) == "a"
+    assert governor.metrics()["models"][MODEL]["in_flight"] == 1
+    stream.close()
+    assert_idle(governor)
+    # A new request for the key starts afresh
+    assert "".join(governor.stream(MODEL, slow_stream(opened), key="k")) == "abcdef"
+    assert len(opened) == 2
+
+
+def test_failed_open_releases_the_slot_once(governor):
+    def fail():
+        raise ValueError("bad request")
+
+    for _ in range(governor.config.MAX_CONCURRENCY + 1):
+        with pytest.raises(ValueError, match="bad request"):
+            list(governor.stream(MODEL, fail, key="k"))
+    assert_idle(governor)
+    # A second release of the BoundedSemaphore would have raised; the slots still work
+    assert "".join(governor.stream(MODEL, slow_stream([], delay=0))) == "abcdef"
+
+
+def test_transient_errors_are_retried(governor):
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("429 Too Many Requests")
+        return "ok"
+
+    assert governor.call(MODEL, flaky) == "ok"
+    assert len(attempts) == 3
+    assert governor.metrics()["retries"] == 2
+
+
+def test_non_transient_errors_fail_immediately(governor):
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("invalid model")
+
+    with pytest.raises(ValueError):
+        governor.call(MODEL, broken, key="k")
+    assert len(attempts) == 1
+    metrics = governor.metrics()
+    assert metrics["retries"] == 0 and metrics["failures"] == 1
+    assert_idle(governor)
+
+
+def test_background_calls_wait_for_interactive_requests_and_stop_when_cancelled(governor):
+    order = []
+    cancelled = threading.Event()
+
+    def background():
+        with background_work(cancelled):
+            order.append(governor.call(MODEL, lambda: "background"))
+            cancelled.set()
+            with pytest.raises(CancelledError):
+                governor.call(MODEL, lambda: "never")
+            order.append("cancelled")
+
+    with interactive_request():
+        worker = threading.Thread(target=background)
+        worker.start()
+        time.sleep(0.1)
+        order.append(governor.call(MODEL, lambda: "interactive"))
+    worker.join(5)
+    assert order == ["interactive", "background", "cancelled"]
+    assert governor.metrics()["background_cancelled"] == 1
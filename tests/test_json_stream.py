@@ -0,0 +1,37 @@
+from utils.json_stream import IncrementalJSONParser
+
+REQUIRED_FIELDS = ("total_candidates", "skills", "average_experience", "total_projects", "candidates")
+
+
+def parse(text: str) -> IncrementalJSONParser:
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    parser.close()
+    return parser
+
+
+def test_reply_cut_inside_candidates_is_incomplete():
+    parser = parse('{"total_candidates": 12, "skills": {"Python": 2}, "average_experience": 4.5, '
+                   '"total_projects": 9, "candidates": [{"name": "A", "experience": 3}, '
+                   '{"name": "B", "exper')
+    assert len(parser.snapshot()["candidates"]) == 1
+    assert "candidates" not in parser.fields
+    assert [f for f in REQUIRED_FIELDS if f not in parser.fields] == ["candidates"]
+
+
+def test_complete_reply_has_every_field():
+    parser = parse('```json\n{"total_candidates": 1, "skills": {}, "average_experience": 2, '
+                   '"total_projects": 3, "candidates": [{"name": "A"}]}\n```')
+    assert parser.done
+    assert all(f in parser.fields for f in REQUIRED_FIELDS)
+
+
+def test_trailing_number_of_truncated_reply_is_dropped():
+    parser = parse('{"name": "A", "total_projects": 12')
+    assert parser.fields == {"name": "A"}
+
+
+def test_trailing_unambiguous_values_are_kept():
+    assert parse('{"a": 1, "b": "text"').fields == {"a": 1, "b": "text"}
+    assert parse('{"a": 1, "b": true').fields == {"a": 1, "b": True}
+    assert parse('{"a": 1, "b": [1, 2]').fields == {"a": 1, "b": [1, 2]}
@@ -0,0 +1,28 @@
+import pytest
+from utils.profiles import CandidateProfiles, normalize_skill
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Java 8", "Java"),
+    ("Java 11", "Java"),
+    ("JAVA", "Java"),
+    ("Python 3.10", "Python"),
+    ("python3", "Python"),
+    ("node v18", "Node.js"),
+    ("S3", "S3"),
+    ("EC2", "EC2"),
+    ("aws lambda", "AWS Lambda"),
+    ("  ", None),
+])
+def test_normalize_skill(raw, expected):
+    assert normalize_skill(raw) == expected
+
+
+def test_version_variants_count_as_one_skill():
+    profiles = CandidateProfiles.from_insights({"candidates": [
+        {"name": "A", "skills": ["Java 8", "Kafka"]},
+        {"name": "B", "skills": ["java", "kafka"]},
+        {"name": "C", "skills": ["Java 11"]},
+    ]})
+    counts = dict(profiles.skill_counts().itertuples(index=False))
+    assert counts == {"Java": 3, "Kafka": 2}
@@ -0,0 +1,52 @@
+import pytest
+from utils.profiles import CandidateProfiles
+from utils.query_router import QueryRouter, compile_question
+
+
+@pytest.fixture
+def profiles():
+    return CandidateProfiles.from_insights({"candidates": [
+        {"name": "Ana", "experience": 6, "projects": 3, "skills": ["Python", "AWS"]},
+        {"name": "Ben", "experience": 3, "projects": 2, "skills": ["AWS"]},
+        {"name": "Cy", "experience": 8, "projects": 4, "skills": ["Python", "SQL"]},
+    ]})
+
+
+@pytest.mark.parametrize("question", [
+    "list everyone with AWS and Kafka",
+    "Who has at least 5 years of Rust experience?",
+    "how many candidates know Kafka",
+    "how many candidates are based in Berlin",
+])
+def test_unresolved_terms_fall_back_to_rag(profiles, question):
+    assert compile_question(question, profiles) is None
+    answer, stats = QueryRouter().route(question, profiles)
+    assert answer is None and stats["route"] == "rag"
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("how many candidates know Snowflake", "**0** candidates with Snowflake."),
+    ("how many candidates are there", "**3** candidates in the pool."),
+    ("how many candidates know Python and AWS", "**1** candidate with Python and AWS."),
+])
+def test_counts(profiles, question, expected):
+    answer, _ = QueryRouter().route(question, profiles)
+    assert answer == expected
+
+
+def test_list_filters(profiles):
+    answer, stats = QueryRouter().route("Who has at least 5 years of experience?", profiles)
+    assert stats["route"] == "structured"
+    assert "Ana" in answer and "Cy" in answer and "Ben" not in answer
+
+    answer, _ = QueryRouter().route("which candidates know Python or SQL", profiles)
+    assert "Ana" in answer and "Cy" in answer and "Ben" not in answer
+
+
+def test_profiles_missing_resumes_fall_back_to_rag(profiles):
+    question = "how many candidates are there"
+    answer, stats = QueryRouter().route(question, profiles, resume_count=12)
+    assert answer is None and stats["reason"] == "profiles cover 3 of 12 resumes"
+
+    answer, _ = QueryRouter().route(question, profiles, resume_count=3)
+    assert answer == "**3** candidates in the pool."
@@ -0,0 +1,63 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds.
+
+    Unlike st.cache_data these caches can be filled from background threads
+    (see utils.warmup) and read by any session.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def evict_folder(self, folder_path: str) -> None:
+        """Drop entries whose key starts with folder_path, leaving other folders' entries."""
+        with self._lock:
+            for key in [k for k in self._entries if isinstance(k, tuple) and k and k[0] == folder_path]:
+                del self._entries[key]
+
+
+def normalize_key(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+retrieval_cache = TTLCache(max_entries=1024)
+response_cache = TTLCache(max_entries=512)
+insights_cache = TTLCache(max_entries=128)
+
+
+def evict_folder(folder_path: str) -> None:
+    """Forget one folder's cached retrievals, answers and insights."""
+    for cache in (retrieval_cache, response_cache, insights_cache):
+        cache.evict_folder(folder_path)
@@ -1,10 +1,20 @@
 import streamlit as st
 from snowflake.cortex import complete
-from utils.snowflake_utils import SnowflakeConnection
-from typing import Dict, List
+from utils.snowflake_utils import SnowflakeConfig, SnowflakeConnection
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
 from dataclasses import dataclass
 from utils.shared import get_file_paths
+from utils.retrieval import CoverageRetriever, RetrievalResult, TieredRetriever, is_pool_wide
+from utils.memory import ConversationMemory, estimate_tokens
+from utils.chunk_store import ChunkRefs, get_chunk_store
+from utils.profiles import get_profiles
+from utils.query_router import QueryRouter
+from utils.governor import get_governor, request_key
+from utils.cache import normalize_key, response_cache, retrieval_cache
+from utils.priority import interactive_request
+from utils.profiling import profiled
 logger = logging.getLogger(__name__)
 
 
@@ -16,25 +26,98 @@ class AppConfig:
     INITIAL_SIDEBAR_STATE: str = "collapsed"
     SEARCH_MODEL: str = "mistral-large2"
     RESPONSE_MODEL: str = "mistral-large2"
+    SEARCH_LIMIT: int = 10
+    CONTEXT_TOKEN_BUDGET: int = 6000
+    MAX_CHUNKS_PER_CANDIDATE: int = 3
+    SEARCH_FANOUT_LIMIT: int = 25
+    SEARCH_WORKERS: int = 8
+    # Two-tier retrieval: resume summaries, then raw chunks for the top candidates
+    TIERED_RETRIEVAL: bool = True
+    MAX_SUMMARIES: int = 40
+    DRILLDOWN_CANDIDATES: int = 3
+    DRILLDOWN_CHUNKS: int = 2
+    MEMORY_MODEL: str = "mistral-large2"
+    HISTORY_TOKEN_BUDGET: int = 1500
+    # Standard recruiter questions precomputed once a folder is searchable
+    WARMUP_QUERIES: tuple = (
+        "Summarize each candidate's experience and key skills",
+        "Which candidates have cloud experience?",
+        "Who has the most data engineering experience?",
+        "Compare all candidates on leadership experience",
+    )
 
 
-class ChatHandler:
-    """Handles chat operations and interactions"""
+@dataclass
+class AnswerStream:
+    """An answer's text stream plus the sources and stats to show with it"""
+    chunks: Optional[Iterator[str]]
+    sources: List[Dict]
+    retrieval: Dict
+    timings: Dict
+    streamed: bool = True
+    answer: str = ""
 
-    def __init__(self, snowflake_session, config: AppConfig, slide_window: int = 5):
+    @classmethod
+    def ready(cls, answer: str, sources: List[Dict], retrieval: Dict, timings: Dict) -> "AnswerStream":
+        """An answer that is already whole (routed or cached), as a single chunk"""
+        return cls(iter([answer]), sources, retrieval, timings, streamed=False, answer=answer)
+
+    def to_dict(self, timings: bool = True) -> Dict:
+        result = {"answer": self.answer, "sources": self.sources, "retrieval": self.retrieval}
+        if timings:
+            result["timings"] = self.timings
+        return result
+
+
+@st.cache_resource
+def get_query_router() -> QueryRouter:
+    """Shared structured-query router"""
+    return QueryRouter()
+
+
+class ChatPipeline:
+    """Routing, retrieval and generation steps, independent of Streamlit session state"""
+
+    def __init__(self, snowflake_session, config: AppConfig):
+        self.session = snowflake_session
+        self.config = config
         self.search_service = SnowflakeConnection.get_search_service(
             snowflake_session)
-        self.slide_window = slide_window
-        self.config = config
+        self.retriever = CoverageRetriever(
+            self.search_service,
+            default_limit=config.SEARCH_LIMIT,
+            token_budget=config.CONTEXT_TOKEN_BUDGET,
+            max_per_candidate=config.MAX_CHUNKS_PER_CANDIDATE,
+            max_fanout=config.SEARCH_FANOUT_LIMIT,
+            max_workers=config.SEARCH_WORKERS
+        )
+        if config.TIERED_RETRIEVAL:
+            self.retriever = TieredRetriever(
+                SnowflakeConnection.get_search_service(
+                    snowflake_session, SnowflakeConfig.SUMMARY_SEARCH_SERVICE),
+                chunk_retriever=self.retriever,
+                drilldown_retriever=CoverageRetriever(
+                    self.search_service,
+                    default_limit=config.DRILLDOWN_CHUNKS,
+                    token_budget=config.CONTEXT_TOKEN_BUDGET,
+                    max_per_candidate=config.DRILLDOWN_CHUNKS,
+                    max_fanout=config.SEARCH_FANOUT_LIMIT,
+                    max_workers=config.SEARCH_WORKERS
+                ),
+                max_summaries=config.MAX_SUMMARIES,
+                drilldown_candidates=config.DRILLDOWN_CANDIDATES,
+                token_budget=config.CONTEXT_TOKEN_BUDGET,
+                focused_summaries=config.SEARCH_LIMIT
+            )
 
-    def get_chat_history(self) -> List[Dict]:
-        """Get recent chat history based on slide window"""
-        messages = st.session_state.get("messages", [])
-        start_index = max(0, len(messages) - self.slide_window)
-        return messages[start_index:len(messages)-1]
+    @staticmethod
+    def route(question: str, folder_path: str) -> Tuple[Optional[str], Dict]:
+        """Answer filter/aggregation questions from extracted profiles, if possible"""
+        return get_query_router().route(
+            question, get_profiles(folder_path), resume_count=len(get_file_paths(folder_path)))
 
-    def summarize_with_history(self, chat_history: List[Dict], question: str) -> str:
-        """Summarize question with chat history context"""
+    def rewrite_query(self, chat_history: str, question: str) -> str:
+        """Extend the question with chat history into a standalone search query"""
         prompt = f"""
             Based on the chat history below and the question, generate a query that extends the question
             with the chat history provided. The query should be in natural language.
@@ -47,87 +130,63 @@ class ChatHandler:
             {question}
             </question>
         """
+        summary = self._complete(self.config.RESPONSE_MODEL, prompt)
+        return summary.replace("'", "")
 
-        try:
-            summary = complete(
-                self.config.RESPONSE_MODEL,
-                prompt,
-                session=SnowflakeConnection.get_connection(),
-                stream=False
-            )
-            return summary.replace("'", "")
-        except Exception as e:
-            logger.error(f"Error summarizing question with history: {str(e)}")
-            raise
-
-    def process_chat_message(self, prompt: str) -> None:
-        """Process chat messages and generate responses"""
-        try:
-            # Get chat history and create context-aware query
-            chat_history = self.get_chat_history()
-
-            if chat_history:
-                context_query = self.summarize_with_history(
-                    chat_history, prompt)
-                logger.info("Using summarized context query for search")
-            else:
-                context_query = prompt
-                logger.info("Using direct prompt for search (no chat history)")
-
-            search_response = self._perform_search(context_query)
-            context_str = self._build_context(search_response.results)
-            self._generate_response(
-                prompt, context_str, search_response.to_json(), chat_history)
-        except Exception as e:
-            logger.error(f"Error processing chat message: {str(e)}")
-            st.error(f"Error occurred: {str(e)}")
-
-    def _perform_search(self, query: str):
-        """Perform search operation"""
-        try:
-            folder_path = st.query_params.get(
-                'folder_path', None) or st.session_state.get("folder_path", "")
-            if not folder_path:
-                raise ValueError(
-                    "Please upload the resumes")
+    def summarize_turns(self, previous_summary: str, new_turns: str) -> str:
+        """Fold new turns into the running conversation summary"""
+        prompt = f"""
+            Update the running summary of a recruiter's conversation about candidate resumes.
+            Keep candidate names, requirements and conclusions. Drop pleasantries and formatting.
+            Answer with only the updated summary in at most 150 words.
 
-            # Ensure folder_path is a string and properly formatted
-            folder_path = str(folder_path).strip().strip('"').strip("'")
-            logger.info(f"Using folder path: {folder_path}")
+            <summary>
+            {previous_summary}
+            </summary>
+            <new_turns>
+            {new_turns}
+            </new_turns>
+        """
+        return self._complete(self.config.MEMORY_MODEL, prompt)
 
+    def retrieve(self, query: str, folder_path: str, pool_wide: bool = False):
+        """Search the folder's resumes for context chunks"""
+        key = (folder_path, normalize_key(query), pool_wide)
+        cached = retrieval_cache.get(key)
+        if cached is None:
             file_paths = get_file_paths(folder_path)
             logger.info(f"File paths: {file_paths}")
+            cached = self.retriever.retrieve(query, file_paths, pool_wide=pool_wide)
+            retrieval_cache.set(key, cached)
+        else:
+            logger.info("Serving search results from cache")
+        # Callers annotate stats, so hand out a copy
+        return RetrievalResult(results=list(cached.results), stats=dict(cached.stats))
 
-            filter_conditions = [
-                {"@eq": {"RELATIVE_PATH": path}} for path in file_paths
-            ]
-
-            # Ensure filter is always an array
-            if len(filter_conditions) == 1:
-                filter_conditions = [filter_conditions[0]]
+    @staticmethod
+    def cached_answer(question: str, folder_path: str) -> Optional[Dict]:
+        """Previously generated answer to a standalone question, if any"""
+        return response_cache.get((folder_path, normalize_key(question)))
 
-            return self.search_service.search(
-                query=query,
-                columns=["chunk"],
-                limit=10,
-                filter={"@or": filter_conditions}
-            )
-        except Exception as e:
-            logger.error(f"Search operation failed: {str(e)}")
-            raise
+    @staticmethod
+    def cache_answer(question: str, folder_path: str, result: Dict) -> None:
+        """Remember the answer to a standalone (history-free) question"""
+        response_cache.set((folder_path, normalize_key(question)), result)
 
     @staticmethod
-    def _build_context(results: List[Dict]) -> str:
-        """Build context string from search results"""
-        return "\n".join([
-            f"Context document {i+1}: {r['chunk']}"
-            for i, r in enumerate(results)
-        ])
+    def build_context(results: List[Dict]) -> str:
+        """Build context string from search results, naming each one's resume file"""
+        lines = []
+        for i, r in enumerate(results):
+            label = "Candidate summary" if r.get("tier") == "summary" else "Context document"
+            source = r.get("relative_path", "").split("/")[-1]
+            lines.append(f"{label} {i+1}" + (f" ({source})" if source else "") + f": {r['chunk']}")
+        return "\n".join(lines)
 
     @staticmethod
-    def _generate_response(prompt: str, context_str: str, source_documents: Dict, chat_history: List[Dict]):
-        """Generate and display chat response"""
-        full_prompt = f"""
+    def build_prompt(question: str, context_str: str, chat_history: str) -> str:
+        """Build the answer prompt"""
+        return f"""
         You are a helpful AI assistant for recruiters. Your task is to provide clear, concise, and relevant information about candidates based on their resumes.
         Use the following context to answer the question, and if you're not sure about something, please say so.
         Consider the chat history when providing your response to maintain conversation continuity.
@@ -140,18 +199,182 @@ class ChatHandler:
         Context from resumes:
         {context_str}
 
-        User Question: {prompt}
+        User Question: {question}
+        """
+
+    def _complete(self, model: str, prompt: str) -> str:
+        """Non-streamed completion through the shared Cortex governor"""
+        return get_governor().call(
+            model,
+            lambda: complete(model, prompt, session=self.session, stream=False),
+            key=request_key(model, prompt)
+        )
+
+    def stream_answer(self, full_prompt: str) -> Iterator[str]:
+        """Stream the answer completion"""
+        model = self.config.RESPONSE_MODEL
+        return get_governor().stream(
+            model,
+            lambda: complete(model, full_prompt, session=self.session, stream=True)
+        )
+
+    def answer_stream(self, question: str, folder_path: str, chat_history: str = "") -> AnswerStream:
+        """Route, retrieve and build the prompt for one question; the answer text streams.
+
+        Routed and cached answers come back as a single chunk. The stream
+        records time to first token and, once exhausted, caches the answer to
+        a standalone question.
         """
-        print("\n\nsession state messages\n\n", st.session_state.messages)
+        timings = {}
+        start = time.perf_counter()
+
+        answer, route_stats = self.route(question, folder_path)
+        timings["route_ms"] = (time.perf_counter() - start) * 1000
+        if answer is not None:
+            timings["total_ms"] = timings["route_ms"]
+            return AnswerStream.ready(answer, [], route_stats, timings)
+
+        if not chat_history:
+            cached = self.cached_answer(question, folder_path)
+            if cached is not None:
+                logger.info("Serving answer from response cache")
+                timings["total_ms"] = (time.perf_counter() - start) * 1000
+                return AnswerStream.ready(cached["answer"], cached["sources"],
+                                          cached["retrieval"], timings)
+
+        stage = time.perf_counter()
+        if chat_history:
+            query = self.rewrite_query(chat_history, question)
+            logger.info("Using summarized context query for search")
+        else:
+            query = question
+        timings["rewrite_ms"] = (time.perf_counter() - stage) * 1000
+
+        stage = time.perf_counter()
+        search_response = self.retrieve(
+            query, folder_path, pool_wide=is_pool_wide(question) or is_pool_wide(query))
+        search_response.stats["routing"] = route_stats
+        timings["retrieve_ms"] = (time.perf_counter() - stage) * 1000
+
+        full_prompt = self.build_prompt(
+            question, self.build_context(search_response.results), chat_history)
+        search_response.stats["prompt_tokens"] = estimate_tokens(full_prompt)
+        result = AnswerStream(None, search_response.results, search_response.stats, timings)
+
+        def generate() -> Iterator[str]:
+            stage = time.perf_counter()
+            for chunk in self.stream_answer(full_prompt):
+                if not result.answer and chunk:
+                    timings["ttft_ms"] = (time.perf_counter() - stage) * 1000
+                    result.retrieval["ttft_ms"] = round(timings["ttft_ms"], 1)
+                    logger.info(f"Time to first token: {result.retrieval['ttft_ms']}ms, "
+                                f"prompt tokens: {result.retrieval['prompt_tokens']}")
+                result.answer += chunk
+                yield chunk
+            timings["generate_ms"] = (time.perf_counter() - stage) * 1000
+            timings["total_ms"] = (time.perf_counter() - start) * 1000
+            if not chat_history:
+                self.cache_answer(question, folder_path, result.to_dict(timings=False))
+
+        result.chunks = generate()
+        return result
+
+    def answer(self, question: str, folder_path: str, chat_history: str = "") -> Dict:
+        """Run the whole pipeline for one question and time each stage"""
+        result = self.answer_stream(question, folder_path, chat_history)
+        for _ in result.chunks:
+            pass
+        return result.to_dict()
+
+
+class ChatHandler:
+    """Handles chat operations and interactions"""
+
+    def __init__(self, snowflake_session, config: AppConfig, slide_window: int = 5):
+        self.pipeline = ChatPipeline(snowflake_session, config)
+        self.slide_window = slide_window
+        self.config = config
+
+    @property
+    def memory(self) -> ConversationMemory:
+        """Conversation memory for the current session"""
+        if "conversation_memory" not in st.session_state:
+            st.session_state["conversation_memory"] = ConversationMemory(
+                self.pipeline.summarize_turns,
+                keep_turns=self.slide_window,
+                token_budget=self.config.HISTORY_TOKEN_BUDGET
+            )
+        return st.session_state["conversation_memory"]
+
+    @staticmethod
+    def _conversation() -> List[Dict]:
+        """Messages after the welcome exchange"""
+        return st.session_state.get("messages", [])[2:]
+
+    def get_chat_history(self) -> str:
+        """Get compacted chat history, excluding the pending question"""
+        history, stats = self.memory.render(self._conversation()[:-1])
+        logger.info(f"Chat history tokens: {stats}")
+        return history
+
+    def process_chat_message(self, prompt: str) -> None:
+        """Process chat messages and generate responses"""
+        with interactive_request(), profiled("chat_message"):
+            self._process_chat_message(prompt)
+
+    def _process_chat_message(self, prompt: str) -> None:
+        try:
+            result = self.pipeline.answer_stream(
+                prompt, self._get_folder_path(), self.get_chat_history())
+            source_refs = self._store_sources(result.sources, result.retrieval)
+            if result.streamed:
+                self._generate_response(result.chunks, source_refs)
+            else:
+                self._render_response(result.answer)
+                self._record_response(result.answer, source_refs)
+            self.memory.update_async(self._conversation())
+            logger.info(f"Cortex governor: {get_governor().metrics()}")
+        except Exception as e:
+            logger.error(f"Error processing chat message: {str(e)}")
+            st.error(f"Error occurred: {str(e)}")
+
+    @staticmethod
+    def _get_folder_path() -> str:
+        """Get the current folder path from query params or session state"""
+        folder_path = st.query_params.get(
+            'folder_path', None) or st.session_state.get("folder_path", "")
+        if not folder_path:
+            raise ValueError(
+                "Please upload the resumes")
+
+        # Ensure folder_path is a string and properly formatted
+        return str(folder_path).strip().strip('"').strip("'")
+
+    @staticmethod
+    def _store_sources(results: List[Dict], stats: Dict) -> Dict:
+        """Put retrieved chunks in the shared store and return compact references"""
+        if "chunk_refs" not in st.session_state:
+            st.session_state["chunk_refs"] = ChunkRefs(get_chunk_store())
+        chunk_ids = st.session_state["chunk_refs"].add(results)
+        return {"chunk_ids": chunk_ids, "retrieval": stats}
+
+    @staticmethod
+    def get_source_documents(message: Dict) -> Dict:
+        """Resolve a message's source references back into documents"""
+        if "source_refs" in message:
+            refs = message["source_refs"]
+            return {
+                "results": get_chunk_store().get_many(refs["chunk_ids"]),
+                "retrieval": refs.get("retrieval", {})
+            }
+        return message.get("source_documents", {})
+
+    def _generate_response(self, chunks: Iterator[str], source_refs: Dict):
+        """Display a streamed chat response"""
         response_placeholder = st.empty()
         response = ""
 
-        for chunk in complete(
-            'mistral-large2',
-            full_prompt,
-            session=SnowflakeConnection.get_connection(),
-            stream=True
-        ):
+        for chunk in chunks:
             # Clear the loading placeholder on first chunk
             if not response:
                 st.session_state.get('loading_placeholder', st.empty()).empty()
@@ -166,11 +389,31 @@ class ChatHandler:
                 </div>
             """, unsafe_allow_html=True)
 
-        st.session_state.messages.append({
+        self._record_response(response, source_refs)
+        return response
+
+    @staticmethod
+    def _render_response(response: str) -> None:
+        """Display a complete (non-streamed) response"""
+        st.session_state.get('loading_placeholder', st.empty()).empty()
+        st.markdown(f"""
+            <div class="message-wrapper assistant">
+                <div class="avatar assistant-avatar">
+                    <span>🧊</span>
+                </div>
+                <div class="message-content">{response}</div>
+            </div>
+        """, unsafe_allow_html=True)
+
+    @staticmethod
+    def _record_response(response: str, source_refs: Dict) -> None:
+        """Append the response to the chat and show its sources"""
+        message = {
             "role": "assistant",
             "content": response,
-            "source_documents": source_documents
-        })
+            "source_refs": source_refs
+        }
+        st.session_state.messages.append(message)
 
         with st.expander("📄 View Source Documents"):
-            st.json(source_documents)
+            st.json(ChatHandler.get_source_documents(message))
@@ -0,0 +1,152 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import weakref
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_id(chunk: Dict) -> str:
+    """Stable id for a retrieved chunk, derived from its file and text."""
+    key = f"{chunk.get('relative_path', '')}\x00{chunk.get('chunk', '')}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+
+class ChunkStore:
+    """Process-wide, reference-counted store of retrieved chunks.
+
+    Chat messages keep only chunk ids; the text lives here once no matter how
+    many sessions or turns reference it. Entries stay in memory in LRU order up
+    to ``max_memory_bytes`` and the least recently used spill to disk. An entry
+    is dropped from memory and disk when its last reference is released.
+    """
+
+    def __init__(self, max_memory_bytes: int = 64 * 1024 * 1024, spill_dir: Optional[str] = None):
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_dir = spill_dir or os.path.join(
+            tempfile.gettempdir(), f"subzero_chunks_{os.getpid()}")
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._spilled = set()
+        self._refcounts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def put_many(self, chunks: List[Dict]) -> List[str]:
+        """Store chunks (or add a reference to existing ones) and return their ids."""
+        ids = []
+        with self._lock:
+            for chunk in chunks:
+                cid = chunk_id(chunk)
+                ids.append(cid)
+                if cid in self._refcounts:
+                    self._refcounts[cid] += 1
+                    continue
+                self._refcounts[cid] = 1
+                self._remember(cid, json.dumps(chunk).encode("utf-8"))
+            self._evict()
+        return ids
+
+    def get_many(self, ids: List[str]) -> List[Dict]:
+        """Resolve ids to chunks, skipping any that were already released."""
+        chunks = []
+        with self._lock:
+            for cid in ids:
+                data = self._load(cid)
+                if data is not None:
+                    chunks.append(json.loads(data))
+            self._evict()
+        return chunks
+
+    def release_many(self, ids: List[str]) -> None:
+        """Drop one reference per id, deleting entries nobody references."""
+        with self._lock:
+            for cid in ids:
+                count = self._refcounts.get(cid, 0) - 1
+                if count > 0:
+                    self._refcounts[cid] = count
+                    continue
+                self._refcounts.pop(cid, None)
+                data = self._memory.pop(cid, None)
+                if data is not None:
+                    self._memory_bytes -= len(data)
+                if cid in self._spilled:
+                    self._spilled.discard(cid)
+                    try:
+                        os.remove(self._spill_path(cid))
+                    except OSError:
+                        pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._refcounts),
+                "references": sum(self._refcounts.values()),
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "spilled_entries": len(self._spilled),
+            }
+
+    def _remember(self, cid: str, data: bytes) -> None:
+        self._memory[cid] = data
+        self._memory_bytes += len(data)
+
+    def _load(self, cid: str) -> Optional[bytes]:
+        if cid in self._memory:
+            self._memory.move_to_end(cid)
+            return self._memory[cid]
+        if cid not in self._spilled:
+            return None
+        with open(self._spill_path(cid), "rb") as f:
+            data = f.read()
+        os.remove(self._spill_path(cid))
+        self._spilled.discard(cid)
+        self._remember(cid, data)
+        return data
+
+    def _evict(self) -> None:
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            cid, data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(data)
+            try:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                with open(self._spill_path(cid), "wb") as f:
+                    f.write(data)
+                self._spilled.add(cid)
+            except OSError as e:
+                logger.error(f"Failed to spill chunk {cid} to disk: {str(e)}")
+                self._refcounts.pop(cid, None)
+
+    def _spill_path(self, cid: str) -> str:
+        return os.path.join(self.spill_dir, f"{cid}.json")
+
+
+class ChunkRefs:
+    """Chunk references held by one session; released when the session is dropped."""
+
+    def __init__(self, store: ChunkStore):
+        self.store = store
+        self.ids: List[str] = []
+        weakref.finalize(self, store.release_many, self.ids)
+
+    def add(self, chunks: List[Dict]) -> List[str]:
+        ids = self.store.put_many(chunks)
+        self.ids.extend(ids)
+        return ids
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_chunk_store() -> ChunkStore:
+    """Shared chunk store for this server process."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ChunkStore()
+        return _store
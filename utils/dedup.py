@@ -0,0 +1,230 @@
+import re
+import zlib
+import threading
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+# Largest prime below 2**32: (a * x + b) stays below 2**64 for 32-bit a, x, b.
+MERSENNE_PRIME = np.uint64(4294967291)
+
+
+@dataclass
+class DedupConfig:
+    """MinHash/LSH settings"""
+    NUM_PERM: int = 64
+    BANDS: int = 16
+    SHINGLE_WORDS: int = 3
+    THRESHOLD: float = 0.8
+    SEED: int = 42
+
+
+class MinHasher:
+    """Word-shingle MinHash signatures, truncated to 16 bits per permutation."""
+
+    def __init__(self, config: DedupConfig):
+        self.config = config
+        rng = np.random.default_rng(config.SEED)
+        self.a = rng.integers(1, 2**32 - 1, size=(config.NUM_PERM, 1), dtype=np.uint64)
+        self.b = rng.integers(0, 2**32 - 1, size=(config.NUM_PERM, 1), dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        words = WORD_PATTERN.findall((text or "").lower())
+        k = self.config.SHINGLE_WORDS
+        grams = [" ".join(words[i:i + k]) for i in range(max(1, len(words) - k + 1))]
+        return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in set(grams)),
+                           dtype=np.uint64, count=len(set(grams)))
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = (self.a * self.shingles(text)[None, :] + self.b) % MERSENNE_PRIME
+        return (hashes.min(axis=1) & np.uint64(0xFFFF)).astype(np.uint16)
+
+
+class LSHIndex:
+    """Array-backed LSH index over MinHash signatures.
+
+    Signatures (uint16 per permutation) live in a growable numpy array. Band
+    buckets are an open-addressing hash table of (band, band hash) keys held
+    in numpy arrays, each slot pointing at the newest row in that bucket and
+    ``chain`` linking to older rows, so memory stays a few hundred bytes per
+    chunk and lookups do not scan the whole index.
+    """
+
+    EMPTY = np.uint64(0)
+    MAX_LOAD = 0.7
+
+    def __init__(self, config: DedupConfig, capacity: int = 1024):
+        self.config = config
+        self.rows = config.NUM_PERM // config.BANDS
+        self.signatures = np.zeros((capacity, config.NUM_PERM), dtype=np.uint16)
+        self.chain = np.full((capacity, config.BANDS), -1, dtype=np.int32)
+        self.slot_keys = np.zeros(capacity * config.BANDS * 2, dtype=np.uint64)
+        self.slot_rows = np.full(capacity * config.BANDS * 2, -1, dtype=np.int32)
+        self.used_slots = 0
+        self.labels: List[Tuple[str, int]] = []
+        self.size = 0
+
+    def band_keys(self, signature: np.ndarray) -> List[int]:
+        """One non-zero 64-bit key per band: band number and band hash."""
+        bands = signature.reshape(self.config.BANDS, self.rows)
+        return [((band_no + 1) << 32) | zlib.crc32(band.tobytes())
+                for band_no, band in enumerate(bands)]
+
+    def query(self, signature: np.ndarray, keys: List[int]) -> int:
+        """Index of the most similar stored chunk above threshold, or -1."""
+        candidates = set()
+        for band_no, key in enumerate(keys):
+            row = int(self.slot_rows[self._find_slot(key)])
+            while row >= 0:
+                candidates.add(row)
+                row = int(self.chain[row, band_no])
+        if not candidates:
+            return -1
+        rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        agreement = (self.signatures[rows] == signature).mean(axis=1)
+        best = int(agreement.argmax())
+        return int(rows[best]) if agreement[best] >= self.config.THRESHOLD else -1
+
+    def add(self, signature: np.ndarray, keys: List[int], label: Tuple[str, int]) -> None:
+        if self.size == len(self.signatures):
+            grown = self.size * 2
+            self.signatures = np.resize(self.signatures, (grown, self.config.NUM_PERM))
+            self.chain = np.resize(self.chain, (grown, self.config.BANDS))
+        if self.used_slots + len(keys) > self.MAX_LOAD * len(self.slot_keys):
+            self._rehash(len(self.slot_keys) * 2)
+
+        row = self.size
+        self.signatures[row] = signature
+        for band_no, key in enumerate(keys):
+            slot = self._find_slot(key)
+            if self.slot_keys[slot] == self.EMPTY:
+                self.slot_keys[slot] = key
+                self.used_slots += 1
+            self.chain[row, band_no] = self.slot_rows[slot]
+            self.slot_rows[slot] = row
+        self.labels.append(label)
+        self.size += 1
+
+    def nbytes(self) -> int:
+        return (self.signatures[:self.size].nbytes + self.chain[:self.size].nbytes
+                + self.slot_keys.nbytes + self.slot_rows.nbytes)
+
+    def _find_slot(self, key: int) -> int:
+        """Slot holding key, or the empty slot where it would go (linear probing)."""
+        capacity = len(self.slot_keys)
+        slot = (key * 0x9E3779B97F4A7C15 >> 17) % capacity
+        while True:
+            stored = self.slot_keys[slot]
+            if stored == self.EMPTY or stored == key:
+                return slot
+            slot = (slot + 1) % capacity
+
+    def _rehash(self, capacity: int) -> None:
+        occupied = np.nonzero(self.slot_keys != self.EMPTY)[0]
+        keys, heads = self.slot_keys[occupied], self.slot_rows[occupied]
+        self.slot_keys = np.zeros(capacity, dtype=np.uint64)
+        self.slot_rows = np.full(capacity, -1, dtype=np.int32)
+        for key, head in zip(keys.tolist(), heads.tolist()):
+            slot = self._find_slot(key)
+            self.slot_keys[slot] = key
+            self.slot_rows[slot] = head
+
+
+class ChunkDeduplicator:
+    """Suppresses near-duplicate chunks within and across files of an upload batch.
+
+    Each batch (folder) has its own index: searches are scoped to one folder,
+    so a chunk must not be dropped because another batch already holds it.
+    Filtering is two-phase: ``filter`` only queries, and the kept chunks join
+    the index through ``commit`` once they are stored, so a failed insert
+    that is retried does not find its own chunks.
+    """
+
+    def __init__(self, config: DedupConfig = None, max_batches: int = 32):
+        self.config = config or DedupConfig()
+        self.hasher = MinHasher(self.config)
+        self.max_batches = max_batches
+        self._indexes: "OrderedDict[str, LSHIndex]" = OrderedDict()
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, folder_path: str, relative_path: str,
+               chunks: List[str]) -> Tuple[List[str], Dict, List[Tuple]]:
+        """Return the chunks to ingest, a dedup report for this file, and the
+        pending index entries to pass to ``commit`` once they are stored."""
+        kept, links, pending = [], [], []
+        file_signatures = np.zeros((len(chunks), self.config.NUM_PERM), dtype=np.uint16)
+        with self._lock:
+            index = self._index(folder_path)
+            for i, chunk in enumerate(chunks):
+                signature = self.hasher.signature(chunk)
+                keys = index.band_keys(signature)
+                match = index.query(signature, keys)
+                if match >= 0:
+                    links.append({"chunk": i, "duplicate_of": index.labels[match]})
+                    continue
+                if kept:
+                    # Within the file: compare against the chunks kept so far
+                    agreement = (file_signatures[:len(kept)] == signature).mean(axis=1)
+                    best = int(agreement.argmax())
+                    if agreement[best] >= self.config.THRESHOLD:
+                        links.append({"chunk": i, "duplicate_of": (relative_path, best)})
+                        continue
+                file_signatures[len(kept)] = signature
+                pending.append((signature, keys, (relative_path, len(kept))))
+                kept.append(chunk)
+
+            totals = self._totals.get(folder_path, {"chunks": 0, "suppressed": 0})
+            batch_chunks = totals["chunks"] + len(chunks)
+            batch_suppressed = totals["suppressed"] + len(links)
+            report = {
+                "file": relative_path,
+                "chunks": len(chunks),
+                "kept": len(kept),
+                "suppressed": len(links),
+                "dedup_ratio": round(len(links) / len(chunks), 3) if chunks else 0.0,
+                "batch_dedup_ratio": round(batch_suppressed / batch_chunks, 3) if batch_chunks else 0.0,
+                "index_bytes": index.nbytes(),
+                "links": links,
+            }
+        logger.info(
+            f"Dedup {relative_path}: kept {report['kept']}/{report['chunks']} chunks "
+            f"(file ratio {report['dedup_ratio']}, batch ratio {report['batch_dedup_ratio']})")
+        return kept, report, pending
+
+    def commit(self, folder_path: str, report: Dict, pending: List[Tuple]) -> None:
+        """Add a stored file's kept chunks to the batch index and totals."""
+        with self._lock:
+            index = self._index(folder_path)
+            for signature, keys, label in pending:
+                index.add(signature, keys, label)
+            totals = self._totals.setdefault(folder_path, {"chunks": 0, "suppressed": 0})
+            totals["chunks"] += report["chunks"]
+            totals["suppressed"] += report["suppressed"]
+
+    def _index(self, folder_path: str) -> LSHIndex:
+        if folder_path not in self._indexes:
+            self._indexes[folder_path] = LSHIndex(self.config)
+            while len(self._indexes) > self.max_batches:
+                evicted, _ = self._indexes.popitem(last=False)
+                self._totals.pop(evicted, None)
+        self._indexes.move_to_end(folder_path)
+        return self._indexes[folder_path]
+
+
+_deduplicator = None
+_deduplicator_lock = threading.Lock()
+
+
+def get_deduplicator() -> ChunkDeduplicator:
+    """Shared chunk deduplicator for this server process."""
+    global _deduplicator
+    with _deduplicator_lock:
+        if _deduplicator is None:
+            _deduplicator = ChunkDeduplicator()
+        return _deduplicator
@@ -0,0 +1,375 @@
+import re
+import time
+import random
+import hashlib
+import itertools
+import threading
+import logging
+from collections import deque
+from concurrent.futures import CancelledError, Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional
+from utils.priority import background_cancelled, wait_for_idle
+
+logger = logging.getLogger(__name__)
+
+TRANSIENT_ERROR_PATTERN = re.compile(
+    r"429|too many requests|throttl|rate limit|timed? ?out|temporar|unavailable|"
+    r"502|503|504|connection (reset|aborted|refused)|try again",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class GovernorConfig:
+    """Cortex call limits"""
+    REQUESTS_PER_SECOND: float = 2.0
+    BURST: int = 5
+    MAX_CONCURRENCY: int = 8
+    MAX_RETRIES: int = 4
+    BACKOFF_BASE: float = 0.5
+    BACKOFF_CAP: float = 8.0
+    # Calls made inside priority.background_work (warm-up) share these slots
+    BACKGROUND_CONCURRENCY: int = 1
+    # Per-model overrides of REQUESTS_PER_SECOND
+    MODEL_RATES: Dict[str, float] = field(default_factory=dict)
+
+
+def is_transient(error: Exception) -> bool:
+    """Throttling, timeouts and 5xx-style errors are worth retrying."""
+    return isinstance(error, (TimeoutError, ConnectionError)) or bool(
+        TRANSIENT_ERROR_PATTERN.search(str(error)))
+
+
+def request_key(*parts: Any) -> str:
+    """Single-flight key for a request made of the given parts."""
+    return hashlib.sha1("\x00".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, up to `burst` banked."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ModelLimiter:
+    """Rate limit, concurrency limit and queue metrics for one model."""
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int):
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.queued = 0
+        self.in_flight = 0
+        self.waits = deque(maxlen=500)
+        self._lock = threading.Lock()
+
+    def enter(self) -> None:
+        start = time.monotonic()
+        with self._lock:
+            self.queued += 1
+        try:
+            self.slots.acquire()
+            self.bucket.acquire()
+        finally:
+            with self._lock:
+                self.queued -= 1
+        with self._lock:
+            self.in_flight += 1
+            self.waits.append(time.monotonic() - start)
+
+    def exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            waits = sorted(self.waits)
+        return {
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "wait_ms_p95": round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else 0.0,
+            "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0,
+        }
+
+
+class SharedStream:
+    """One streamed completion read by every caller with the same key.
+
+    Chunks are buffered as they arrive. Each reader replays the buffer and,
+    once caught up, pulls the next chunk itself, so the stream keeps going as
+    long as anyone is reading. If every reader leaves before the end, the
+    stream is abandoned and ``on_close`` still runs.
+    """
+
+    def __init__(self, open_stream: Callable[[], Iterator[str]],
+                 on_close: Callable[[bool], None]):
+        self._open_stream = open_stream
+        self._on_close = on_close
+        self._iterator: Optional[Iterator[str]] = None
+        self.chunks = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.readers = 0
+        self._lock = threading.Lock()
+        self._pull_lock = threading.Lock()
+
+    def attach(self) -> bool:
+        """Register a reader; False if the stream has already ended."""
+        with self._lock:
+            if self.done:
+                return False
+            self.readers += 1
+            return True
+
+    def read(self) -> Iterator[str]:
+        """Chunks from the start; the caller must have attached."""
+        i = 0
+        try:
+            while True:
+                if i < len(self.chunks):
+                    i += 1
+                    yield self.chunks[i - 1]
+                elif self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                else:
+                    with self._pull_lock:
+                        if i == len(self.chunks) and not self.done:
+                            self._pull()
+        finally:
+            with self._lock:
+                self.readers -= 1
+                abandoned = self.readers == 0 and not self.done
+                if abandoned:
+                    self.done = True
+                    self.error = CancelledError("Stream abandoned by every reader")
+            if abandoned:
+                close = getattr(self._iterator, "close", None)
+                if close is not None:
+                    close()
+                self._on_close(self._iterator is not None)
+
+    def result(self) -> str:
+        """The whole response, reading (and pulling) the stream to its end."""
+        return "".join(self.read())
+
+    def _pull(self) -> None:
+        try:
+            if self._iterator is None:
+                self._iterator = self._open_stream()
+            self.chunks.append(next(self._iterator))
+            return
+        except StopIteration:
+            error = None
+        except Exception as e:
+            error = e
+        with self._lock:
+            self.done = True
+            self.error = error
+        self._on_close(self._iterator is not None)
+
+
+class CortexGovernor:
+    """Shared gate for Cortex calls.
+
+    Every call goes through a per-model token bucket and concurrency limit,
+    transient failures are retried with jittered exponential backoff, and
+    calls made with the same ``key`` while one is already in flight wait for
+    that call's result instead of issuing their own. Keyed streams share one
+    completion the same way, and a keyed call and a keyed stream for the same
+    key coalesce with each other. Background calls run in
+    a low-concurrency lane that only admits them while no interactive request
+    is in flight.
+    """
+
+    def __init__(self, config: Optional[GovernorConfig] = None):
+        self.config = config or GovernorConfig()
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._in_flight: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._background_slots = threading.BoundedSemaphore(self.config.BACKGROUND_CONCURRENCY)
+        self.counters = {"calls": 0, "coalesced": 0, "retries": 0, "failures": 0,
+                         "background_cancelled": 0}
+
+    def call(self, model: str, fn: Callable[[], Any], key: Optional[str] = None) -> Any:
+        """Run fn under the model's limits; identical keyed calls share one result."""
+        # Admit background calls before taking the key, so an interactive
+        # request never coalesces onto a call that is waiting for it to finish.
+        with self._lane():
+            return self._call(model, fn, key)
+
+    def _call(self, model: str, fn: Callable[[], Any], key: Optional[str]) -> Any:
+        if key is None:
+            return self._run(model, fn)
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None or (
+                isinstance(future, SharedStream) and not future.attach())
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._run(model, fn)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._release(key, future)
+
+    def stream(self, model: str, fn: Callable[[], Iterator[str]],
+               key: Optional[str] = None) -> Iterator[str]:
+        """Stream fn's chunks, holding a concurrency slot until the stream ends.
+
+        Only opening the stream (up to its first chunk) is retried; chunks
+        already yielded cannot be replayed. Callers with the same ``key``
+        read one shared stream; if a keyed call is in flight instead, its
+        result is yielded whole once it arrives.
+        """
+        with self._lane():
+            limiter = self._limiter(model)
+
+            def open_stream() -> Iterator[str]:
+                def first_chunk():
+                    iterator = iter(fn())
+                    return next(iterator, None), iterator
+
+                limiter.enter()
+                try:
+                    first, iterator = self._with_retries(limiter, first_chunk)
+                except Exception:
+                    limiter.exit()
+                    raise
+                return itertools.chain([] if first is None else [first], iterator)
+
+            def on_close(opened: bool) -> None:
+                if opened:
+                    limiter.exit()
+                if key is not None:
+                    self._release(key, shared)
+
+            with self._lock:
+                shared = self._in_flight.get(key) if key is not None else None
+                if isinstance(shared, Future):
+                    self.counters["coalesced"] += 1
+                elif shared is not None and shared.attach():
+                    self.counters["coalesced"] += 1
+                else:
+                    shared = SharedStream(open_stream, on_close)
+                    shared.attach()
+                    if key is not None:
+                        self._in_flight[key] = shared
+
+            if isinstance(shared, Future):
+                yield shared.result()
+            else:
+                yield from shared.read()
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            limiters = dict(self._limiters)
+            counters = dict(self.counters)
+            counters["coalescing_keys"] = len(self._in_flight)
+        return {**counters, "models": {m: l.metrics() for m, l in limiters.items()}}
+
+    def _release(self, key: str, flight: Any) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is flight:
+                del self._in_flight[key]
+
+    @contextmanager
+    def _lane(self):
+        """Background calls: wait for a background slot and for interactive
+        requests to drain, and raise CancelledError once the job is cancelled."""
+        cancelled = background_cancelled()
+        if cancelled is None:
+            yield
+            return
+        with self._background_slots:
+            wait_for_idle(cancelled)
+            if cancelled.is_set():
+                with self._lock:
+                    self.counters["background_cancelled"] += 1
+                raise CancelledError("Background work cancelled")
+            yield
+
+    def _run(self, model: str, fn: Callable[[], Any]) -> Any:
+        limiter = self._limiter(model)
+        limiter.enter()
+        try:
+            return self._with_retries(limiter, fn)
+        finally:
+            limiter.exit()
+
+    def _with_retries(self, limiter: ModelLimiter, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.counters["calls"] += 1
+        for attempt in range(self.config.MAX_RETRIES + 1):
+            try:
+                return fn()
+            except Exception as e:
+                if attempt == self.config.MAX_RETRIES or not is_transient(e):
+                    with self._lock:
+                        self.counters["failures"] += 1
+                    raise
+                delay = random.uniform(0, min(
+                    self.config.BACKOFF_CAP, self.config.BACKOFF_BASE * 2 ** attempt))
+                with self._lock:
+                    self.counters["retries"] += 1
+                logger.warning(
+                    f"Transient Cortex error, retry {attempt + 1} in {delay:.2f}s: {str(e)}")
+                time.sleep(delay)
+                # Retries spend rate-limit tokens like any other request.
+                limiter.bucket.acquire()
+
+    def _limiter(self, model: str) -> ModelLimiter:
+        with self._lock:
+            if model not in self._limiters:
+                self._limiters[model] = ModelLimiter(
+                    self.config.MODEL_RATES.get(model, self.config.REQUESTS_PER_SECOND),
+                    self.config.BURST,
+                    self.config.MAX_CONCURRENCY
+                )
+            return self._limiters[model]
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> CortexGovernor:
+    """Shared Cortex governor for this server process."""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = CortexGovernor()
+        return _governor
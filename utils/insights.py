@@ -0,0 +1,146 @@
+import logging
+from typing import Callable, Dict, Iterator, List, Optional
+from snowflake.cortex import complete
+from utils.snowflake_utils import SnowflakeConnection
+from utils.shared import get_file_paths
+from utils.governor import get_governor, request_key
+from utils.cache import insights_cache
+from utils.chat import AppConfig
+from utils.json_stream import IncrementalJSONParser
+
+logger = logging.getLogger(__name__)
+
+# Top-level fields of a complete insights response
+REQUIRED_FIELDS = ("total_candidates", "skills", "average_experience", "total_projects", "candidates")
+
+
+def build_insights_prompt(session, folder_path: str, prompt: str,
+                          progress: Callable[[int, str], None]) -> str:
+    """Search the folder's resumes and build the insights completion prompt."""
+    progress(40, "Retrieving resume data...")
+    file_paths = get_file_paths(folder_path)
+
+    progress(60, "Analyzing resume contents...")
+    filter_conditions = [
+        {"@eq": {"RELATIVE_PATH": path}} for path in file_paths]
+    search_response = SnowflakeConnection.get_search_service(
+        session
+    ).search(
+        query=prompt,
+        columns=["chunk"],
+        filter={
+            "@or": filter_conditions} if len(filter_conditions) > 1 else filter_conditions[0],
+        limit=10
+    )
+
+    progress(80, "Generating AI insights...")
+    results = search_response.results
+    context_str = "\n".join(
+        [f"Context document {i+1}: {r['chunk']}" for i,
+            r in enumerate(results)]
+    )
+
+    no_of_candidates = len(file_paths)
+    base_prompt = (
+        f"Analyze {no_of_candidates} resumes and provide structured insights in JSON format. "
+        "The response must be ONLY valid JSON with no additional text or formatting.\n\n" +
+        prompt
+    )
+    return f"{base_prompt}\n\nContext from resumes: {context_str}"
+
+
+def fetch_insights(session, folder_path: str, prompt: str,
+                   on_progress: Optional[Callable[[int, str], None]] = None) -> str:
+    """Run the Auto Insights analysis for a folder and return the raw model response.
+
+    Results are kept in the shared insights cache, so a warm-up run or another
+    session's request serves later page loads immediately.
+    """
+    key = (folder_path, prompt)
+    cached = insights_cache.get(key)
+    if cached is not None:
+        return cached
+
+    progress = on_progress or (lambda percent, text: None)
+    full_prompt = build_insights_prompt(session, folder_path, prompt, progress)
+
+    # Identical analyses requested concurrently, streamed or not, share one Cortex call
+    model = AppConfig.RESPONSE_MODEL
+    response = get_governor().call(
+        model,
+        lambda: complete(model, full_prompt, session=session, stream=False),
+        key=request_key(model, full_prompt)
+    )
+
+    parser = IncrementalJSONParser()
+    parser.feed(response)
+    parser.close()
+    cache_if_complete(key, response, parser)
+    progress(100, "")
+    return response
+
+
+def stream_insights(session, folder_path: str, prompt: str,
+                    on_progress: Optional[Callable[[int, str], None]] = None) -> Iterator[str]:
+    """Stream the Auto Insights response for a folder.
+
+    A cached response is yielded whole; otherwise the completion is streamed
+    and cached once it finishes with every required field. Concurrent
+    requests for the same analysis read one shared stream, or wait for a
+    warm-up's in-flight fetch_insights call.
+    """
+    key = (folder_path, prompt)
+    cached = insights_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    progress = on_progress or (lambda percent, text: None)
+    full_prompt = build_insights_prompt(session, folder_path, prompt, progress)
+
+    model = AppConfig.RESPONSE_MODEL
+    parser = IncrementalJSONParser()
+    response = ""
+    for chunk in get_governor().stream(
+            model, lambda: complete(model, full_prompt, session=session, stream=True),
+            key=request_key(model, full_prompt)):
+        parser.feed(chunk)
+        response += chunk
+        yield chunk
+
+    parser.close()
+    cache_if_complete(key, response, parser)
+    progress(100, "")
+
+
+def missing_fields(parser: IncrementalJSONParser) -> List[str]:
+    """Required fields the parsed response did not finish; a field cut off
+    mid-array (e.g. ``candidates``) counts as missing."""
+    return [field for field in REQUIRED_FIELDS if field not in parser.fields]
+
+
+def cache_if_complete(key, response: str, parser: IncrementalJSONParser) -> bool:
+    """Cache a closed parser's response only if every required field finished."""
+    missing = missing_fields(parser)
+    if missing:
+        logger.warning(f"Not caching incomplete insights response, missing {missing}")
+        return False
+    insights_cache.set(key, response)
+    return True
+
+
+def parse_insights_json(response: str, require_complete: bool = False) -> Dict:
+    """Parse the AI response, keeping every complete field of a truncated or fenced reply.
+
+    With ``require_complete`` a reply missing any required field is rejected.
+    """
+    parser = IncrementalJSONParser()
+    parser.feed(response)
+    insights = parser.close()
+    if not insights:
+        logger.error("No valid JSON object found in response")
+        raise ValueError("No valid JSON object found in response")
+    missing = missing_fields(parser)
+    if require_complete and missing:
+        raise ValueError(f"Incomplete insights response, missing {missing}")
+    return insights
@@ -0,0 +1,130 @@
+import json
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+_MALFORMED = object()
+
+
+class IncrementalJSONParser:
+    """Parses a streamed JSON object, exposing each top-level field once it is complete.
+
+    Objects inside top-level arrays (e.g. ``candidates``) are exposed one by
+    one as they close, before the array itself is complete. Text before the
+    first ``{`` (code fences, preambles) and anything after the object closes
+    is ignored. A field whose text is not valid JSON is skipped, and a
+    truncated stream keeps everything completed before the cut. ``fields``
+    holds only top-level values that finished; ``snapshot()`` also includes
+    the completed items of an array cut off mid-stream.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.stack: List[str] = []
+        self.started = False
+        self.done = False
+        self.in_string = False
+        self.escape = False
+        self.key = None
+        self.key_start = None
+        self.value_start = None
+        self.item_start = None
+        self.fields: Dict[str, Any] = {}
+        self.items: Dict[str, List[Any]] = {}
+
+    def feed(self, text: str) -> bool:
+        """Consume more text; True if a field or array item completed."""
+        self.buffer += text or ""
+        completed = False
+        buffer = self.buffer
+        i = self.pos
+        while i < len(buffer) and not self.done:
+            c = buffer[i]
+            if not self.started:
+                if c == "{":
+                    self.started = True
+                    self.stack.append(c)
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self.key_start is not None:
+                        key = self._load(buffer[self.key_start:i + 1])
+                        self.key = None if key is _MALFORMED else key
+                        self.key_start = None
+            elif c == '"':
+                self.in_string = True
+                if len(self.stack) == 1 and self.value_start is None:
+                    self.key_start = i
+            elif c == ":" and len(self.stack) == 1:
+                self.value_start = i + 1
+            elif c in "{[":
+                self.stack.append(c)
+                if len(self.stack) == 3 and self.stack[1:] == ["[", "{"]:
+                    self.item_start = i
+            elif c in "}]":
+                if self.item_start is not None and len(self.stack) == 3 and c == "}":
+                    completed |= self._complete_item(buffer[self.item_start:i + 1])
+                    self.item_start = None
+                self.stack.pop()
+                if not self.stack:
+                    completed |= self._complete_field(buffer[self.value_start:i] if self.value_start else "")
+                    self.done = True
+            elif c == "," and len(self.stack) == 1:
+                completed |= self._complete_field(buffer[self.value_start:i] if self.value_start else "")
+            i += 1
+        self.pos = i
+        return completed
+
+    def close(self) -> Dict[str, Any]:
+        """End of stream: keep a trailing field if it parses, return the snapshot.
+
+        A trailing number is dropped, since the cut may have fallen inside it
+        ("12" of "123"); strings, literals and closed arrays end unambiguously.
+        """
+        if not self.done and len(self.stack) == 1 and self.value_start is not None and not self.in_string:
+            raw = self.buffer[self.value_start:].strip()
+            value = self._load(raw) if raw else _MALFORMED
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.key, self.value_start = None, None
+            else:
+                self._complete_field(raw)
+        self.done = True
+        return self.snapshot()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Completed fields, plus the completed items of arrays still streaming."""
+        partial = {key: list(values) for key, values in self.items.items()}
+        partial.update(self.fields)
+        return partial
+
+    def _complete_field(self, raw: str) -> bool:
+        key, self.key, self.value_start = self.key, None, None
+        raw = raw.strip()
+        if key is None or not raw:
+            return False
+        value = self._load(raw)
+        if value is _MALFORMED:
+            return False
+        self.fields[key] = value
+        return True
+
+    def _complete_item(self, raw: str) -> bool:
+        value = self._load(raw)
+        if value is _MALFORMED or self.key is None:
+            return False
+        self.items.setdefault(self.key, []).append(value)
+        return True
+
+    @staticmethod
+    def _load(raw: str) -> Any:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            logger.warning(f"Skipping malformed JSON fragment: {raw[:80]!r}")
+            return _MALFORMED
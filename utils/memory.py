@@ -0,0 +1,104 @@
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Summaries are refreshed off the request path; one shared pool per process.
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory")
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token)."""
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def format_turn(message: Dict) -> str:
+    role = "User" if message["role"] == "user" else "Assistant"
+    return f"{role}: {message['content']}"
+
+
+class ConversationMemory:
+    """Rolling conversation memory: a compact summary plus recent turns verbatim.
+
+    Turns older than ``keep_turns`` are folded into the summary by a background
+    job after each answer, so building the prompt never waits on an LLM call.
+    If the summary lags behind, the unsummarized turns stay verbatim and the
+    oldest of them are dropped to respect ``token_budget``.
+    """
+
+    def __init__(self, summarizer: Callable[[str, str], str], keep_turns: int = 4,
+                 token_budget: int = 1500):
+        self.summarizer = summarizer
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.summary = ""
+        self.summarized_upto = 0
+        self._lock = threading.Lock()
+        self._pending = None
+
+    def render(self, messages: List[Dict]) -> Tuple[str, Dict]:
+        """Build the history block for a prompt and its token accounting."""
+        with self._lock:
+            summary = self.summary
+            verbatim = [format_turn(m) for m in messages[self.summarized_upto:]]
+
+        summary_block = f"Summary of earlier conversation: {summary}" if summary else ""
+        # The summary may use at most half the budget; recent turns get the rest.
+        summary_block = summary_block[:self.token_budget // 2 * CHARS_PER_TOKEN]
+        budget = self.token_budget - estimate_tokens(summary_block)
+
+        kept = []
+        used = 0
+        for turn in reversed(verbatim):
+            cost = estimate_tokens(turn) + 1  # joining newline
+            if used + cost > budget:
+                if not kept and budget > 1:
+                    # Always keep a (truncated) copy of the latest turn.
+                    kept.append(turn[-(budget - 1) * CHARS_PER_TOKEN:])
+                    used = budget
+                break
+            kept.append(turn)
+            used += cost
+        kept.reverse()
+
+        text = "\n".join([block for block in [summary_block] if block] + kept)
+        stats = {
+            "summary_tokens": estimate_tokens(summary_block),
+            "verbatim_tokens": used,
+            "verbatim_turns": len(kept),
+            "dropped_turns": len(verbatim) - len(kept),
+            "total_tokens": estimate_tokens(text),
+            "budget": self.token_budget,
+        }
+        return text, stats
+
+    def update_async(self, messages: List[Dict]) -> None:
+        """Fold turns that fell out of the verbatim window into the summary."""
+        cutoff = len(messages) - self.keep_turns
+        with self._lock:
+            if cutoff <= self.summarized_upto:
+                return
+            if self._pending is not None and not self._pending.done():
+                # The next update picks up whatever this one misses.
+                return
+            start = self.summarized_upto
+            previous = self.summary
+            new_turns = "\n".join(format_turn(m) for m in messages[start:cutoff])
+            self._pending = _executor.submit(
+                self._update, previous, new_turns, cutoff)
+
+    def _update(self, previous: str, new_turns: str, cutoff: int) -> None:
+        try:
+            summary = self.summarizer(previous, new_turns).strip()
+        except Exception as e:
+            logger.error(f"Conversation summary update failed: {str(e)}")
+            return
+        with self._lock:
+            self.summary = summary
+            self.summarized_upto = cutoff
+        logger.info(
+            f"Conversation summary updated through turn {cutoff} ({estimate_tokens(summary)} tokens)")
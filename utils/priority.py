@@ -0,0 +1,46 @@
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+# Number of user-facing requests currently being served in this process.
+_active = 0
+_condition = threading.Condition()
+# Cancellation event of the background job running on this thread, if any.
+_lane = threading.local()
+
+
+@contextmanager
+def interactive_request():
+    """Mark a user-facing request so background work yields to it."""
+    global _active
+    with _condition:
+        _active += 1
+    try:
+        yield
+    finally:
+        with _condition:
+            _active -= 1
+            _condition.notify_all()
+
+
+def wait_for_idle(cancelled: threading.Event, poll: float = 0.5) -> None:
+    """Block background work until no interactive request is running or it is cancelled."""
+    with _condition:
+        while _active > 0 and not cancelled.is_set():
+            _condition.wait(poll)
+
+
+@contextmanager
+def background_work(cancelled: threading.Event):
+    """Run the block in the background lane: its Cortex calls yield to
+    interactive requests and stop once `cancelled` is set."""
+    _lane.cancelled = cancelled
+    try:
+        yield
+    finally:
+        _lane.cancelled = None
+
+
+def background_cancelled() -> Optional[threading.Event]:
+    """Cancellation event if this thread is doing background work, else None."""
+    return getattr(_lane, "cancelled", None)
@@ -0,0 +1,217 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+
+# Canonical names for common spellings; keys are normalized (lowercase,
+# punctuation collapsed, separated version numbers removed).
+SKILL_ALIASES = {
+    "py": "Python",
+    "python": "Python",
+    "js": "JavaScript",
+    "javascript": "JavaScript",
+    "ts": "TypeScript",
+    "typescript": "TypeScript",
+    "node": "Node.js",
+    "nodejs": "Node.js",
+    "node js": "Node.js",
+    "react": "React",
+    "reactjs": "React",
+    "react js": "React",
+    "golang": "Go",
+    "go": "Go",
+    "c++": "C++",
+    "cpp": "C++",
+    "c#": "C#",
+    "csharp": "C#",
+    "aws": "AWS",
+    "amazon web services": "AWS",
+    "gcp": "GCP",
+    "google cloud": "GCP",
+    "google cloud platform": "GCP",
+    "azure": "Azure",
+    "microsoft azure": "Azure",
+    "k8s": "Kubernetes",
+    "kubernetes": "Kubernetes",
+    "postgres": "PostgreSQL",
+    "postgresql": "PostgreSQL",
+    "ml": "Machine Learning",
+    "machine learning": "Machine Learning",
+    "ai": "AI",
+    "artificial intelligence": "AI",
+    "nlp": "NLP",
+    "tf": "TensorFlow",
+    "tensorflow": "TensorFlow",
+    "pytorch": "PyTorch",
+    "torch": "PyTorch",
+    "spark": "Spark",
+    "apache spark": "Spark",
+    "pyspark": "Spark",
+    "snowflake": "Snowflake",
+    "terraform": "Terraform",
+    "docker": "Docker",
+    "sql": "SQL",
+}
+
+# A version is stripped only when it is set off from the name ("Java 11",
+# "Node v18", "Python-3.10"). Attached digits are part of the name ("S3",
+# "EC2") unless what precedes them is a known skill ("python3").
+_SEPARATED_VERSION = re.compile(r"[\s\-_]+v?\d+(\.\d+|\.x)*$")
+_ATTACHED_VERSION = re.compile(r"\d+(\.\d+|\.x)*$")
+_SEPARATORS = re.compile(r"[\s\-_/.]+")
+
+
+def _alias(key: str) -> Optional[str]:
+    return SKILL_ALIASES.get(key) or SKILL_ALIASES.get(key.replace(" ", ""))
+
+
+def normalize_skill(name: str) -> Optional[str]:
+    """Map a raw skill string to its canonical vocabulary entry.
+
+    Unknown skills are canonicalized from the normalized key, so spelling and
+    version variants ("Java 8", "java", "JAVA 11") become one entry.
+    """
+    key = _SEPARATED_VERSION.sub("", str(name or "").strip().lower())
+    key = _SEPARATORS.sub(" ", key).strip()
+    if not key:
+        return None
+    canonical = _alias(key) or _alias(_ATTACHED_VERSION.sub("", key).strip())
+    if canonical:
+        return canonical
+    return " ".join(
+        word.upper() if len(word) <= 3 or any(c.isdigit() for c in word) else word.capitalize()
+        for word in key.split())
+
+
+class CandidateProfiles:
+    """Columnar candidate profiles built from the insights JSON.
+
+    ``candidates`` has one row per candidate; ``skills`` has one row per
+    (candidate, normalized skill). All dashboard metrics are group-bys over
+    these frames, so filtering by skill or experience needs no new LLM call.
+    """
+
+    CANDIDATE_COLUMNS = ["candidate_id", "name", "experience", "projects",
+                         "key_achievements", "ai_take"]
+
+    def __init__(self, candidates: pd.DataFrame, skills: pd.DataFrame,
+                 pool_skills: pd.DataFrame):
+        self.candidates = candidates
+        self.skills = skills
+        # Pool-level counts reported by the model, used when it gave no per-candidate skills.
+        self.pool_skills = pool_skills
+
+    @classmethod
+    def from_insights(cls, insights: Dict) -> "CandidateProfiles":
+        records = insights.get("candidates", []) or []
+        candidates = pd.DataFrame({
+            "candidate_id": range(len(records)),
+            "name": [str(c.get("name", "")) for c in records],
+            "experience": pd.to_numeric(
+                pd.Series([c.get("experience") for c in records], dtype="object"),
+                errors="coerce").fillna(0.0).astype("float64"),
+            "projects": pd.to_numeric(
+                pd.Series([c.get("projects") for c in records], dtype="object"),
+                errors="coerce").fillna(0).astype("int64"),
+            "key_achievements": [str(c.get("key_achievements", "")) for c in records],
+            "ai_take": [str(c.get("ai_take", "")) for c in records],
+        }, columns=cls.CANDIDATE_COLUMNS)
+
+        skills = pd.DataFrame({
+            "candidate_id": range(len(records)),
+            "skill": [c.get("skills") or [] for c in records],
+        }).explode("skill")
+        skills["skill"] = skills["skill"].map(normalize_skill, na_action="ignore")
+        skills = (skills.dropna(subset=["skill"])
+                  .drop_duplicates()
+                  .astype({"candidate_id": "int64", "skill": "category"})
+                  .reset_index(drop=True))
+
+        pool = pd.DataFrame(
+            list((insights.get("skills") or {}).items()), columns=["skill", "count"])
+        pool["skill"] = pool["skill"].map(normalize_skill)
+        pool["count"] = pd.to_numeric(pool["count"], errors="coerce").fillna(0)
+        pool = pool.dropna(subset=["skill"]).groupby(
+            "skill", as_index=False)["count"].sum()
+
+        return cls(candidates, skills, pool)
+
+    @property
+    def has_candidate_skills(self) -> bool:
+        return not self.skills.empty
+
+    def skill_vocabulary(self) -> List[str]:
+        source = self.skills["skill"] if self.has_candidate_skills else self.pool_skills["skill"]
+        return sorted(pd.unique(source.astype(str)))
+
+    def experience_range(self) -> Tuple[float, float]:
+        if self.candidates.empty:
+            return 0.0, 0.0
+        return float(self.candidates["experience"].min()), float(self.candidates["experience"].max())
+
+    def filter(self, skills: Optional[List[str]] = None,
+               experience: Optional[Tuple[float, float]] = None) -> "CandidateProfiles":
+        """Candidates having all the given skills within an experience range."""
+        mask = pd.Series(True, index=self.candidates.index)
+        if experience is not None:
+            mask &= self.candidates["experience"].between(*experience)
+        if skills:
+            if self.has_candidate_skills:
+                matched = (self.skills[self.skills["skill"].isin(skills)]
+                           .groupby("candidate_id", observed=True)["skill"].nunique())
+                ids = matched.index[matched == len(set(skills))]
+                mask &= self.candidates["candidate_id"].isin(ids)
+            else:
+                mask &= False
+
+        candidates = self.candidates[mask]
+        selected = self.skills[self.skills["candidate_id"].isin(candidates["candidate_id"])]
+        pool = self.pool_skills if mask.all() else self.pool_skills.iloc[0:0]
+        return CandidateProfiles(candidates, selected, pool)
+
+    def metrics(self) -> Dict:
+        return {
+            "total_candidates": int(len(self.candidates)),
+            "average_experience": float(self.candidates["experience"].mean()) if len(self.candidates) else 0.0,
+            "total_projects": int(self.candidates["projects"].sum()),
+        }
+
+    def skill_counts(self, pool_only: bool = False) -> pd.DataFrame:
+        """Number of candidates per skill, as Skill/Count columns.
+
+        ``pool_only`` uses the model's pool-level counts even when per-candidate
+        skills exist (e.g. while candidates are still streaming in).
+        """
+        if self.has_candidate_skills and not pool_only:
+            counts = (self.skills.groupby("skill", observed=True)["candidate_id"]
+                      .nunique().reset_index())
+        else:
+            counts = self.pool_skills.copy()
+        counts.columns = ["Skill", "Count"]
+        return counts
+
+
+MAX_REGISTERED_FOLDERS = 256
+_registry: "OrderedDict[str, CandidateProfiles]" = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+def register_profiles(folder_path: str, profiles: CandidateProfiles) -> None:
+    """Make a folder's extracted profiles available to every session."""
+    with _registry_lock:
+        _registry[folder_path] = profiles
+        _registry.move_to_end(folder_path)
+        while len(_registry) > MAX_REGISTERED_FOLDERS:
+            _registry.popitem(last=False)
+
+
+def forget_profiles(folder_path: str) -> None:
+    """Drop a folder's profiles once its resumes change."""
+    with _registry_lock:
+        _registry.pop(folder_path, None)
+
+
+def get_profiles(folder_path: str) -> Optional[CandidateProfiles]:
+    with _registry_lock:
+        return _registry.get(folder_path)
@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+import cProfile
+import functools
+import threading
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProfilingConfig:
+    """Opt-in request profiling settings"""
+    ENABLED: bool = str(os.environ.get("SUBZERO_PROFILE", st.secrets.get("PROFILE", ""))).lower() in ("1", "true", "yes")
+    QUERY_PARAM: str = "profile"
+    THRESHOLD_MS: float = float(st.secrets.get("PROFILE_THRESHOLD_MS", 2000))
+    SAMPLE_INTERVAL: float = 0.005
+    OUTPUT_DIR: str = "profiles"
+    MAX_PROFILES: int = 25
+
+
+_local = threading.local()
+
+
+def profiling_enabled() -> bool:
+    """Profiling is on via config/env, or for requests with ?profile=1."""
+    if ProfilingConfig.ENABLED:
+        return True
+    try:
+        return st.query_params.get(ProfilingConfig.QUERY_PARAM, "") in ("1", "true")
+    except Exception:
+        return False
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True, name="profile-sampler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+
+def _write_profile(name: str, elapsed_ms: float, profiler, stacks: Counter) -> None:
+    os.makedirs(ProfilingConfig.OUTPUT_DIR, exist_ok=True)
+    base = os.path.join(
+        ProfilingConfig.OUTPUT_DIR,
+        f"{time.strftime('%Y%m%d-%H%M%S')}_{name}_{int(elapsed_ms)}ms")
+
+    # Collapsed stacks: one "frame;frame;frame count" line each, for
+    # flamegraph.pl, speedscope or inferno.
+    with open(f"{base}.folded", "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    if profiler is not None:
+        profiler.dump_stats(f"{base}.prof")
+
+    # Keep the newest MAX_PROFILES profiles (file names start with a timestamp).
+    stems = sorted({os.path.splitext(n)[0] for n in os.listdir(ProfilingConfig.OUTPUT_DIR)})
+    for stem in stems[:max(0, len(stems) - ProfilingConfig.MAX_PROFILES)]:
+        for ext in (".folded", ".prof"):
+            path = os.path.join(ProfilingConfig.OUTPUT_DIR, stem + ext)
+            if os.path.exists(path):
+                os.remove(path)
+    logger.warning(f"Slow request {name} took {elapsed_ms:.0f}ms; profile written to {base}.folded")
+
+
+@contextmanager
+def profiled(name: str):
+    """Profile a block when profiling is enabled, keeping it only if it was slow.
+
+    Only the outermost profiled block on a thread records; nested blocks show
+    up inside its profile and are added to its file name.
+    """
+    if getattr(_local, "active", False):
+        _local.labels.append(name)
+        yield
+        return
+    if not profiling_enabled():
+        yield
+        return
+
+    _local.active = True
+    _local.labels = [name]
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident(), ProfilingConfig.SAMPLE_INTERVAL)
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one cProfile at a time per process; keep the samples.
+        profiler = None
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        sampler.stopped.set()
+        sampler.join()
+        _local.active = False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= ProfilingConfig.THRESHOLD_MS:
+            try:
+                _write_profile("+".join(dict.fromkeys(_local.labels)),
+                               elapsed_ms, profiler, sampler.stacks)
+            except OSError as e:
+                logger.error(f"Failed to write profile for {name}: {str(e)}")
+
+
+def profile(name: str):
+    """Decorator form of profiled()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profiled(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
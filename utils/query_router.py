@@ -0,0 +1,241 @@
+import re
+import sqlite3
+import threading
+import weakref
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from utils.profiles import CandidateProfiles, SKILL_ALIASES
+
+logger = logging.getLogger(__name__)
+
+COUNT_PATTERN = re.compile(r"\b(how many|number of|count)\b", re.IGNORECASE)
+LIST_PATTERN = re.compile(
+    r"\b(who|list|which|show|find|name|everyone|anyone|candidates with)\b", re.IGNORECASE)
+AVERAGE_PATTERN = re.compile(
+    r"\b(average|mean|avg)\b.*\bexperience\b", re.IGNORECASE)
+# Questions that need resume text, or that refer back to earlier turns.
+RAG_PATTERN = re.compile(
+    r"\b(why|how (?:does|did|do|would|good|well)|describe|explain|tell me|summar\w*|"
+    r"compare|strongest|best|fit|suitable|recommend|them|they|those|these|their|his|her)\b",
+    re.IGNORECASE)
+EXPERIENCE_PATTERN = re.compile(
+    r"(?P<op>more than|over|above|greater than|at least|minimum of|less than|under|"
+    r"below|fewer than|at most|>=|<=|>|<)?\s*(?P<years>\d+(?:\.\d+)?)\s*(?P<plus>\+)?\s*"
+    r"(?:or more\s+|or less\s+)?(?:years?|yrs?)",
+    re.IGNORECASE)
+# Words that shape a filter/aggregation question without qualifying it. Any other
+# word left after skills and experience are matched is a filter we cannot
+# apply (an unknown skill, a role, a location), so the question goes to RAG.
+STRUCTURAL_WORDS = frozenset("""
+    a an the of in on at to for from by about with without and or either any all both
+    is are was were be been being do does did has have had having there here
+    how many number count total who whom whose which what list show find give name names
+    me us our my we i you please
+    candidate candidates resume resumes people person applicant applicants pool everyone
+    everybody anyone anybody someone somebody one ones
+    know knows knew knowing knowledge skill skills skilled experience experienced
+    expertise background proficient proficiency familiar familiarity worked work works
+    working use uses used using mention mentions mentioned mentioning listed
+    year years yr yrs more than over above greater less under below fewer most least
+    minimum maximum average mean avg
+""".split())
+OPERATORS = {
+    "more than": ">", "over": ">", "above": ">", "greater than": ">", ">": ">",
+    "at least": ">=", "minimum of": ">=", ">=": ">=",
+    "less than": "<", "under": "<", "below": "<", "fewer than": "<", "<": "<",
+    "at most": "<=", "<=": "<=",
+}
+
+
+@dataclass
+class StructuredQuery:
+    """A filter/aggregation question compiled to SQL over candidate profiles."""
+    intent: str
+    skills: List[str] = field(default_factory=list)
+    match_any: bool = False
+    experience: Optional[Tuple[str, float]] = None
+
+    def to_sql(self) -> Tuple[str, List[Any]]:
+        where, params = [], []
+        if self.experience:
+            op, years = self.experience
+            where.append(f"c.experience {op} ?")
+            params.append(years)
+        if self.skills:
+            placeholders = ", ".join("?" for _ in self.skills)
+            having = "" if self.match_any else f" HAVING COUNT(DISTINCT skill) = {len(self.skills)}"
+            where.append(
+                f"c.candidate_id IN (SELECT candidate_id FROM skills "
+                f"WHERE skill IN ({placeholders}) GROUP BY candidate_id{having})")
+            params.extend(self.skills)
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+        if self.intent == "count":
+            return f"SELECT COUNT(*) FROM candidates c{clause}", params
+        if self.intent == "average":
+            return f"SELECT AVG(c.experience), COUNT(*) FROM candidates c{clause}", params
+        return (f"SELECT c.name, c.experience FROM candidates c{clause} "
+                f"ORDER BY c.experience DESC, c.name", params)
+
+    def describe(self) -> str:
+        parts = []
+        if self.skills:
+            parts.append(f" {'or' if self.match_any else 'and'} ".join(self.skills))
+        if self.experience:
+            op, years = self.experience
+            words = {">": "more than", ">=": "at least", "<": "less than", "<=": "at most"}
+            parts.append(f"{words[op]} {years:g} years of experience")
+        return f"with {' and '.join(parts)}" if parts else "in the pool"
+
+
+def _match_skills(question: str, vocabulary: List[str]) -> Tuple[List[str], str]:
+    """Canonical skills mentioned in the question, in order of appearance.
+
+    Known skills nobody in the pool has (e.g. "Snowflake" when no profile
+    lists it) still match, so the filter answers zero instead of vanishing.
+    Two-letter aliases ("go", "ai") only match when someone has the skill.
+    Also returns the lowercased question with the matched text blanked out.
+    """
+    lowered = question.lower()
+    found = []
+    names = {name.lower(): name for name in vocabulary}
+    names.update({alias: canonical for alias, canonical in SKILL_ALIASES.items()
+                  if canonical in vocabulary or len(alias) > 2})
+    for surface in sorted(names, key=len, reverse=True):
+        match = re.search(rf"(?<![\w+#]){re.escape(surface)}(?![\w+#])", lowered)
+        if match:
+            found.append((match.start(), names[surface]))
+            # Blank out the match so "Apache Spark" does not also match "Spark".
+            lowered = lowered[:match.start()] + " " * len(surface) + lowered[match.end():]
+    ordered = []
+    for _, skill in sorted(found):
+        if skill not in ordered:
+            ordered.append(skill)
+    return ordered, lowered
+
+
+def _unresolved_terms(remainder: str) -> List[str]:
+    """Words that are neither structure nor an already-matched filter."""
+    return [word for word in re.findall(r"[a-z][a-z'+#]*", remainder)
+            if word.strip("'") not in STRUCTURAL_WORDS and not word.endswith("'s")]
+
+
+def compile_question(question: str, profiles: CandidateProfiles) -> Optional[StructuredQuery]:
+    """Compile a filter/aggregation question, or return None to use RAG."""
+    if RAG_PATTERN.search(question):
+        return None
+
+    if AVERAGE_PATTERN.search(question):
+        intent = "average"
+    elif COUNT_PATTERN.search(question):
+        intent = "count"
+    elif LIST_PATTERN.search(question):
+        intent = "list"
+    else:
+        return None
+
+    experience = None
+    match = EXPERIENCE_PATTERN.search(question)
+    if match and (intent != "average" or match.group("op")):
+        # A bare "5 years" or "5+ years" means at least five.
+        op = OPERATORS.get((match.group("op") or "").lower(), ">=")
+        experience = (op, float(match.group("years")))
+
+    skills, remainder = _match_skills(question, profiles.skill_vocabulary())
+    if skills and not profiles.has_candidate_skills:
+        # Only pool-level skill counts were extracted; per-candidate filters need RAG.
+        return None
+
+    unresolved = _unresolved_terms(remainder)
+    if unresolved:
+        # e.g. "Rust", or a skill nobody's profile lists under that name: answering
+        # without that filter would be confidently wrong.
+        logger.info(f"Unresolved terms {unresolved}; using RAG")
+        return None
+
+    if intent == "list" and not skills and experience is None:
+        return None
+    if intent == "count" and not skills and experience is None \
+            and not re.search(r"\bcandidates?|resumes?|people|applicants?\b", question, re.IGNORECASE):
+        return None
+
+    match_any = bool(skills) and len(skills) > 1 and bool(
+        re.search(r"\bor\b|\beither\b|\bany of\b", question, re.IGNORECASE))
+    return StructuredQuery(intent=intent, skills=skills, match_any=match_any, experience=experience)
+
+
+class QueryRouter:
+    """Answers filter and aggregation questions with SQL over extracted profiles.
+
+    Each folder's profiles are loaded once into an in-memory SQLite database;
+    questions that do not compile, folders without extracted profiles, and
+    profiles that do not cover every resume in the folder fall back to the
+    RAG path.
+    """
+
+    def __init__(self):
+        self._databases: "weakref.WeakKeyDictionary[CandidateProfiles, sqlite3.Connection]" = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def route(self, question: str, profiles: Optional[CandidateProfiles],
+              resume_count: Optional[int] = None) -> Tuple[Optional[str], Dict]:
+        """Return (answer, stats); answer is None when the question should use RAG.
+
+        Profiles are extracted by an LLM from a sample of the folder, so counts
+        and lists are only exact when they cover all `resume_count` resumes.
+        """
+        start = time.perf_counter()
+        stats = {"route": "rag"}
+
+        if profiles is None or profiles.candidates.empty:
+            stats["reason"] = "no extracted profiles for folder"
+        elif resume_count is not None and len(profiles.candidates) != resume_count:
+            stats["reason"] = f"profiles cover {len(profiles.candidates)} of {resume_count} resumes"
+        else:
+            query = compile_question(question, profiles)
+            if query is None:
+                stats["reason"] = "not a filter or aggregation question"
+            else:
+                sql, params = query.to_sql()
+                rows = self._execute(profiles, sql, params)
+                stats.update({"route": "structured", "intent": query.intent,
+                              "sql": sql, "params": params})
+                answer = self._format(query, rows)
+                stats["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+                logger.info(f"Query routing: {stats}")
+                return answer, stats
+
+        stats["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        logger.info(f"Query routing: {stats}")
+        return None, stats
+
+    def _execute(self, profiles: CandidateProfiles, sql: str, params: List[Any]) -> List[tuple]:
+        with self._lock:
+            db = self._databases.get(profiles)
+            if db is None:
+                db = sqlite3.connect(":memory:", check_same_thread=False)
+                profiles.candidates[["candidate_id", "name", "experience", "projects"]].to_sql(
+                    "candidates", db, index=False)
+                profiles.skills.astype({"skill": str}).to_sql("skills", db, index=False)
+                db.execute("CREATE INDEX skills_skill ON skills (skill)")
+                self._databases[profiles] = db
+            return db.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _format(query: StructuredQuery, rows: List[tuple]) -> str:
+        subject = query.describe()
+        if query.intent == "count":
+            count = rows[0][0]
+            return f"**{count}** candidate{'s' if count != 1 else ''} {subject}."
+        if query.intent == "average":
+            average, count = rows[0]
+            if not count:
+                return f"No candidates {subject}."
+            return f"Average experience of {count} candidate{'s' if count != 1 else ''} {subject}: **{average:.1f} years**."
+        if not rows:
+            return f"No candidates {subject}."
+        lines = "".join(f"<br>• {name} ({experience:g} years)" for name, experience in rows)
+        return f"**{len(rows)}** candidate{'s' if len(rows) != 1 else ''} {subject}:{lines}"
@@ -0,0 +1,179 @@
+import threading
+import streamlit as st
+from typing import Any, Dict, List
+from utils.snowflake_utils import SnowflakeConfig, SnowflakeConnection
+from utils.shared import get_file_paths
+from utils.logging_utils import setup_logging
+
+logger = setup_logging()
+
+# Upload batches live at resume/<YYYY-MM-DD>/<batch_id>/<file>.pdf
+BATCH_DATE_EXPR = "SPLIT_PART(relative_path, '/', 2)"
+BATCH_ID_EXPR = "SPLIT_PART(relative_path, '/', 3)"
+
+
+class RetentionManager:
+    """Keeps chunks_table and the search index sized to active upload batches."""
+
+    @staticmethod
+    @st.cache_resource
+    def ensure_clustering() -> None:
+        """Cluster the chunk table by batch date and batch id.
+
+        Purges and folder lookups filter on the relative_path prefix, so
+        clustering on its date/batch parts lets Snowflake prune micro-partitions
+        instead of scanning every historical upload.
+        """
+        session = SnowflakeConnection.get_connection()
+        try:
+            session.sql(f"""
+                ALTER TABLE {SnowflakeConfig.CHUNK_TABLE}
+                CLUSTER BY ({BATCH_DATE_EXPR}, {BATCH_ID_EXPR})
+            """).collect()
+            logger.info("Chunk table clustered by batch date and batch id.")
+        except Exception as e:
+            logger.warning(f"Could not set chunk table clustering: {str(e)}")
+
+    @staticmethod
+    def get_index_stats() -> Dict[str, Any]:
+        """Report chunk table size, split into active, expired and sample batches.
+
+        The sample folder is never purged, so it has its own bucket rather than
+        counting as expired.
+        """
+        session = SnowflakeConnection.get_connection()
+        rows = session.sql(f"""
+            SELECT
+                CASE
+                    WHEN relative_path LIKE '{SnowflakeConfig.SAMPLE_FOLDER}/%' THEN 'sample'
+                    WHEN TRY_TO_DATE({BATCH_DATE_EXPR}) < DATEADD(day, -{SnowflakeConfig.RETENTION_DAYS}, CURRENT_DATE()) THEN 'expired'
+                    ELSE 'active'
+                END AS bucket,
+                COUNT(DISTINCT {BATCH_DATE_EXPR} || '/' || {BATCH_ID_EXPR}) AS batches,
+                COUNT(DISTINCT relative_path) AS files,
+                COUNT(*) AS chunks,
+                COALESCE(SUM(LENGTH(chunk)), 0) AS chunk_bytes
+            FROM {SnowflakeConfig.CHUNK_TABLE}
+            GROUP BY 1;
+        """).collect()
+
+        stats = {
+            bucket: {"batches": 0, "files": 0, "chunks": 0, "chunk_bytes": 0}
+            for bucket in ("active", "expired", "sample")
+        }
+        for row in rows:
+            bucket = stats[row["BUCKET"]]
+            for key in ("batches", "files", "chunks", "chunk_bytes"):
+                bucket[key] += row[key.upper()]
+        return stats
+
+    @staticmethod
+    def get_expired_batches() -> List[str]:
+        """Return folder paths of upload batches older than the retention window."""
+        session = SnowflakeConnection.get_connection()
+        rows = session.sql(f"""
+            SELECT DISTINCT 'resume/' || {BATCH_DATE_EXPR} || '/' || {BATCH_ID_EXPR} AS folder_path
+            FROM {SnowflakeConfig.CHUNK_TABLE}
+            WHERE relative_path LIKE 'resume/%'
+              AND TRY_TO_DATE({BATCH_DATE_EXPR}) < DATEADD(day, -{SnowflakeConfig.RETENTION_DAYS}, CURRENT_DATE());
+        """).collect()
+        return [
+            row["FOLDER_PATH"] for row in rows
+            if row["FOLDER_PATH"] != SnowflakeConfig.SAMPLE_FOLDER
+        ]
+
+    @staticmethod
+    def purge_batch(folder_path: str) -> None:
+        """Delete a batch's staged files, chunks and summaries.
+
+        Expired batches are found through the chunk table, so the staged files
+        go first and the chunks only once they are gone: a failure leaves the
+        batch to be retried on the next purge.
+        """
+        session = SnowflakeConnection.get_connection()
+        session.sql(
+            f"REMOVE @{SnowflakeConfig.DATABASE}.{SnowflakeConfig.SCHEMA}.{SnowflakeConfig.STAGE}/{folder_path}/"
+        ).collect()
+        session.sql(f"""
+            DELETE FROM {SnowflakeConfig.CHUNK_TABLE}
+            WHERE relative_path LIKE '{folder_path}/%';
+        """).collect()
+        try:
+            session.sql(f"""
+                DELETE FROM {SnowflakeConfig.SUMMARY_TABLE}
+                WHERE relative_path LIKE '{folder_path}/%';
+            """).collect()
+        except Exception as e:
+            # The summary tier is optional; its table may not exist.
+            logger.warning(f"Could not delete summaries for {folder_path}: {str(e)}")
+        logger.info(f"Purged expired batch {folder_path}")
+
+    @staticmethod
+    def purge_expired() -> int:
+        """Purge every expired batch and refresh the stage and search indexes."""
+        expired = RetentionManager.get_expired_batches()
+        if not expired:
+            logger.info("No expired upload batches to purge.")
+            return 0
+
+        for folder_path in expired:
+            try:
+                RetentionManager.purge_batch(folder_path)
+            except Exception as e:
+                logger.error(f"Failed to purge batch {folder_path}: {str(e)}")
+
+        session = SnowflakeConnection.get_connection()
+        session.sql(
+            f"ALTER STAGE {SnowflakeConfig.DATABASE}.{SnowflakeConfig.SCHEMA}.{SnowflakeConfig.STAGE} REFRESH;"
+        ).collect()
+        for service in (SnowflakeConfig.SEARCH_SERVICE, SnowflakeConfig.SUMMARY_SEARCH_SERVICE):
+            try:
+                session.sql(
+                    f"ALTER CORTEX SEARCH SERVICE {SnowflakeConfig.DATABASE}.{SnowflakeConfig.SCHEMA}.{service} REFRESH;"
+                ).collect()
+            except Exception as e:
+                # The service also catches up on its own target lag.
+                logger.warning(f"Search service {service} refresh failed: {str(e)}")
+
+        get_file_paths.clear()
+        return len(expired)
+
+    @staticmethod
+    def run_purge() -> Dict[str, Any]:
+        """Purge expired batches and log index size; errors are logged, not raised."""
+        try:
+            RetentionManager.ensure_clustering()
+            purged = RetentionManager.purge_expired()
+            stats = RetentionManager.get_index_stats()
+            logger.info(
+                f"Retention: purged {purged} batches; active index "
+                f"{stats['active']['files']} files / {stats['active']['chunks']} chunks "
+                f"({stats['active']['chunk_bytes']} bytes), expired remaining "
+                f"{stats['expired']['chunks']} chunks")
+            return stats
+        except Exception as e:
+            logger.error(f"Retention purge failed: {str(e)}")
+            return {}
+
+    @staticmethod
+    @st.cache_resource(ttl=SnowflakeConfig.RETENTION_CHECK_INTERVAL)
+    def run_scheduled_purge() -> threading.Thread:
+        """Start a background purge at most once per check interval per process.
+
+        The DELETE, REMOVE and REFRESH statements run off the page-load path,
+        so no user's request waits on them.
+        """
+        thread = threading.Thread(
+            target=RetentionManager.run_purge, name="retention-purge", daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    try:
+        RetentionManager.ensure_clustering()
+        print("Before purge:", RetentionManager.get_index_stats())
+        print("Purged batches:", RetentionManager.purge_expired())
+        print("After purge:", RetentionManager.get_index_stats())
+    except Exception as e:
+        logger.error("Retention run failed: %s", str(e))
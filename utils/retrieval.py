@@ -0,0 +1,258 @@
+import re
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+from utils.memory import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+POOL_WIDE_PATTERN = re.compile(
+    r"\b(all|every|each|everyone|everybody|compare|comparison|rank|ranking|"
+    r"pool|shortlist|which candidates|who among|top \d+)\b",
+    re.IGNORECASE
+)
+
+
+def is_pool_wide(question: str) -> bool:
+    """Detect questions that need every candidate represented in the context."""
+    return bool(POOL_WIDE_PATTERN.search(question or ""))
+
+
+@dataclass
+class RetrievalResult:
+    """Search results plus coverage statistics, shaped like a search response."""
+    results: List[Dict]
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps({"results": self.results, "retrieval": self.stats})
+
+
+class CoverageRetriever:
+    """Retrieves chunks so that pool-wide questions see every candidate.
+
+    Focused questions use a single top-k search across the folder. Pool-wide
+    questions size k from the candidate count, capped by the context token
+    budget, then either fan out one search per RELATIVE_PATH concurrently or,
+    for pools larger than the fan-out limit or the budget, over-fetch once and
+    take chunks round-robin across files. When the budget holds fewer chunks
+    than there are candidates, the uncovered count is reported in the stats.
+    """
+
+    def __init__(self, search_service, default_limit: int = 10, token_budget: int = 6000,
+                 avg_chunk_tokens: int = 300, max_per_candidate: int = 3,
+                 max_fanout: int = 25, max_workers: int = 8):
+        self.search_service = search_service
+        self.default_limit = default_limit
+        self.token_budget = token_budget
+        self.avg_chunk_tokens = avg_chunk_tokens
+        self.max_per_candidate = max_per_candidate
+        self.max_fanout = max_fanout
+        self.max_workers = max_workers
+
+    def retrieve(self, query: str, file_paths: List[str], pool_wide: bool = False) -> RetrievalResult:
+        """Retrieve context chunks for a query restricted to file_paths."""
+        start = time.perf_counter()
+
+        if pool_wide and len(file_paths) > 1:
+            k_total = self._pool_k(len(file_paths))
+            if len(file_paths) <= min(self.max_fanout, k_total):
+                mode = "fanout"
+                per_candidate = max(1, k_total // len(file_paths))
+                results = self._fanout_search(query, file_paths, per_candidate)
+                requests = len(file_paths)
+            else:
+                mode = "round_robin"
+                candidates = self._search(
+                    query, self._folder_filter(file_paths), min(k_total * 3, 1000))
+                results = self._round_robin(candidates, k_total)
+                requests = 1
+        else:
+            mode = "topk"
+            results = self._search(
+                query, self._folder_filter(file_paths), self.default_limit)
+            requests = 1
+
+        covered = {r.get("relative_path") for r in results if r.get("relative_path")}
+        stats = {
+            "mode": mode,
+            "requests": requests,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "chunks": len(results),
+            "candidates": len(file_paths),
+            "candidates_covered": len(covered),
+            "coverage": round(len(covered) / len(file_paths), 3) if file_paths else 0.0,
+            "uncovered": len(file_paths) - len(covered),
+        }
+        if pool_wide and stats["uncovered"]:
+            logger.warning(
+                f"Pool-wide retrieval covered {len(covered)}/{len(file_paths)} candidates "
+                f"within the {self.token_budget}-token context budget")
+        logger.info(f"Retrieval stats: {stats}")
+        return RetrievalResult(results=results, stats=stats)
+
+    def _pool_k(self, n_candidates: int) -> int:
+        """Chunks for a pool-wide question: up to max_per_candidate each, within the budget."""
+        budget_k = max(1, self.token_budget // self.avg_chunk_tokens)
+        return min(n_candidates * self.max_per_candidate, budget_k)
+
+    @staticmethod
+    def _folder_filter(file_paths: List[str]) -> Dict:
+        return {"@or": [{"@eq": {"RELATIVE_PATH": path}} for path in file_paths]}
+
+    def _search(self, query: str, search_filter: Dict, limit: int) -> List[Dict]:
+        response = self.search_service.search(
+            query=query,
+            columns=["chunk", "relative_path"],
+            limit=limit,
+            filter=search_filter
+        )
+        return [self._normalize(r) for r in response.results]
+
+    def _fanout_search(self, query: str, file_paths: List[str], per_candidate: int) -> List[Dict]:
+        def search_one(path):
+            results = self._search(query, {"@eq": {"RELATIVE_PATH": path}}, per_candidate)
+            for r in results:
+                r.setdefault("relative_path", path)
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(file_paths))) as pool:
+            per_path = list(pool.map(search_one, file_paths))
+
+        # Interleave so each candidate's best chunk comes before anyone's second.
+        results = []
+        for rank in range(per_candidate):
+            for chunks in per_path:
+                if rank < len(chunks):
+                    results.append(chunks[rank])
+        return results
+
+    def _round_robin(self, candidates: List[Dict], k: int) -> List[Dict]:
+        """Take each file's best chunk before any file's second, up to k chunks.
+
+        Files are visited in order of their best search rank and each file
+        contributes at most max_per_candidate chunks; linear in the candidates.
+        """
+        buckets: Dict[str, List[Dict]] = {}
+        for c in candidates:
+            bucket = buckets.setdefault(c.get("relative_path", ""), [])
+            if len(bucket) < self.max_per_candidate:
+                bucket.append(c)
+
+        results = []
+        for rank in range(self.max_per_candidate):
+            for bucket in buckets.values():
+                if rank < len(bucket):
+                    results.append(bucket[rank])
+                    if len(results) == k:
+                        return results
+        return results
+
+    @staticmethod
+    def _normalize(result: Dict) -> Dict:
+        return {key.lower(): value for key, value in dict(result).items()}
+
+
+class TieredRetriever:
+    """Two-tier retrieval: per-resume summaries first, raw chunks for a few candidates.
+
+    The summary tier holds one compact record per resume, so a single search
+    puts the whole pool in context for a fraction of the chunk tokens. Raw
+    chunks are then fetched only for the top-ranked candidates, and for any
+    candidate that has no summary yet. Focused questions get the top
+    ``focused_summaries`` summaries, pool-wide ones up to ``max_summaries``;
+    either way summaries and chunks together stay within the token budget,
+    with room kept for the drill-down chunks. If the summary tier is
+    unavailable or empty the chunk retriever answers alone.
+    """
+
+    def __init__(self, summary_service, chunk_retriever: CoverageRetriever,
+                 drilldown_retriever: CoverageRetriever, max_summaries: int = 40,
+                 drilldown_candidates: int = 3, token_budget: int = 6000,
+                 focused_summaries: int = 10):
+        self.summary_service = summary_service
+        self.chunk_retriever = chunk_retriever
+        self.drilldown_retriever = drilldown_retriever
+        self.max_summaries = max_summaries
+        self.drilldown_candidates = drilldown_candidates
+        self.token_budget = token_budget
+        self.focused_summaries = focused_summaries
+
+    def retrieve(self, query: str, file_paths: List[str], pool_wide: bool = False) -> RetrievalResult:
+        """Retrieve summaries for the pool plus detail chunks for the best matches."""
+        start = time.perf_counter()
+        limit = min(len(file_paths), self.max_summaries if pool_wide else self.focused_summaries)
+        try:
+            found = self._search_summaries(query, file_paths, limit)
+        except Exception as e:
+            logger.warning(f"Summary search failed, using chunks only: {str(e)}")
+            found = []
+        if not found:
+            return self.chunk_retriever.retrieve(query, file_paths, pool_wide=pool_wide)
+
+        drilldown_reserve = (self.drilldown_candidates * self.drilldown_retriever.max_per_candidate
+                             * self.drilldown_retriever.avg_chunk_tokens)
+        summaries, summary_tokens = self._within_budget(
+            found, max(0, self.token_budget - drilldown_reserve))
+
+        summarized = [s["relative_path"] for s in summaries]
+        drilldown = summarized[:self.drilldown_candidates]
+        if len(found) < limit:
+            # Everything the tier holds came back: the rest have no summary yet
+            have_summary = {s["relative_path"] for s in found}
+            missing = [p for p in file_paths if p not in have_summary]
+            drilldown += missing[:self.drilldown_retriever.max_fanout]
+        chunks = self.drilldown_retriever.retrieve(
+            query, drilldown, pool_wide=True) if drilldown else RetrievalResult(results=[])
+        chunk_results, chunk_tokens = self._within_budget(
+            chunks.results, self.token_budget - summary_tokens)
+
+        results = summaries + chunk_results
+        covered = {r.get("relative_path") for r in results if r.get("relative_path")}
+        stats = {
+            "mode": "tiered",
+            "requests": 1 + chunks.stats.get("requests", 0),
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "summaries": len(summaries),
+            "summaries_dropped": len(found) - len(summaries),
+            "drilldown_candidates": len(drilldown),
+            "chunks": len(chunk_results),
+            "context_tokens": summary_tokens + chunk_tokens,
+            "candidates": len(file_paths),
+            "candidates_covered": len(covered),
+            "coverage": round(len(covered) / len(file_paths), 3) if file_paths else 0.0,
+        }
+        logger.info(f"Retrieval stats: {stats}")
+        return RetrievalResult(results=results, stats=stats)
+
+    @staticmethod
+    def _within_budget(results: List[Dict], budget: int) -> Tuple[List[Dict], int]:
+        """Leading results whose estimated tokens fit the budget, and their total."""
+        kept, used = [], 0
+        for r in results:
+            tokens = estimate_tokens(r["chunk"])
+            if used + tokens > budget:
+                break
+            kept.append(r)
+            used += tokens
+        return kept, used
+
+    def _search_summaries(self, query: str, file_paths: List[str], limit: int) -> List[Dict]:
+        if not file_paths:
+            return []
+        response = self.summary_service.search(
+            query=query,
+            columns=["summary", "relative_path"],
+            limit=limit,
+            filter=CoverageRetriever._folder_filter(file_paths)
+        )
+        results = []
+        for r in response.results:
+            r = CoverageRetriever._normalize(r)
+            results.append({"chunk": r.get("summary", ""),
+                            "relative_path": r.get("relative_path", ""),
+                            "tier": "summary"})
+        return results
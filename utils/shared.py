@@ -1,5 +1,6 @@
 import re
 import os
+import json
 import datetime
 import random
 import string
@@ -7,6 +8,10 @@ import streamlit as st
 from markitdown import MarkItDown
 from utils.snowflake_utils import SnowflakeConfig, SnowflakeConnection
 from utils.logging_utils import setup_logging
+from utils.cache import evict_folder
+from utils.dedup import get_deduplicator
+from utils.summaries import queue_summary
+from utils.profiles import forget_profiles
 
 logger = setup_logging()
 
@@ -22,7 +27,12 @@ def append_folder_path(folder_path):
 
 
 def upload_to_snowflake(file_name, file_data):
-    """Upload a file to a Snowflake stage and insert metadata into the database."""
+    """Upload a file to a Snowflake stage and insert metadata into the database.
+
+    Near-duplicate chunks (within the file or already ingested for this batch)
+    are skipped; returns the dedup report for the file. A compact summary of
+    the resume is queued for the summary tier, if it is configured.
+    """
     try:
         session = SnowflakeConnection.get_connection()
         sanitized_file_name = sanitize_filename(file_name)
@@ -42,11 +52,14 @@ def upload_to_snowflake(file_name, file_data):
         st.session_state['folder_path'] = folder_path
         st.query_params.folder_path = folder_path
 
+        relative_path = f"{folder_path}/{sanitized_file_name}"
         stage_path = f"@{SnowflakeConfig.DATABASE}.{SnowflakeConfig.SCHEMA}.{SnowflakeConfig.STAGE}/{folder_path}"
         put_query = f"PUT file://{os.path.abspath(temp_file_path)} {stage_path} AUTO_COMPRESS=FALSE"
         session.sql(put_query).collect()
-        st.session_state["uploaded_files"].append(
-            f"{folder_path}/{sanitized_file_name}")
+        st.session_state["uploaded_files"].append(relative_path)
+        # Profiles and insights extracted before this file no longer describe the folder
+        forget_profiles(folder_path)
+        st.session_state.get("folder_insights", {}).pop(folder_path, None)
 
         refresh_query = f"ALTER STAGE {SnowflakeConfig.DATABASE}.{SnowflakeConfig.SCHEMA}.{SnowflakeConfig.STAGE} REFRESH;"
         session.sql(refresh_query).collect()
@@ -54,20 +67,33 @@ def upload_to_snowflake(file_name, file_data):
         md = MarkItDown()
         parsed_content = md.convert(temp_file_path)
 
-        insert_query = f"""
-        INSERT INTO {SnowflakeConfig.CHUNK_TABLE} (relative_path, size, file_url, scoped_file_url, chunk)
-        SELECT relative_path, 
-               size,
-               file_url, 
-               build_scoped_file_url(@{SnowflakeConfig.STAGE}, relative_path) AS scoped_file_url,
-               func.chunk AS chunk
-        FROM 
-            directory(@{SnowflakeConfig.STAGE}),
-        TABLE(text_chunker (TO_VARCHAR('{parsed_content.text_content}'))
-        ) as func
-        WHERE relative_path LIKE 'resume/%/{random_string}/%.pdf';
-        """
-        session.sql(insert_query).collect()
+        chunk_query = "SELECT func.chunk AS chunk FROM TABLE(text_chunker(TO_VARCHAR(?))) AS func"
+        chunk_rows = session.sql(
+            chunk_query, params=[parsed_content.text_content]).collect()
+        deduplicator = get_deduplicator()
+        chunks, dedup_report, pending = deduplicator.filter(
+            folder_path, relative_path, [row['CHUNK'] for row in chunk_rows])
+
+        if chunks:
+            insert_query = f"""
+            INSERT INTO {SnowflakeConfig.CHUNK_TABLE} (relative_path, size, file_url, scoped_file_url, chunk)
+            SELECT relative_path,
+                   size,
+                   file_url,
+                   build_scoped_file_url(@{SnowflakeConfig.STAGE}, relative_path) AS scoped_file_url,
+                   f.value::VARCHAR AS chunk
+            FROM
+                directory(@{SnowflakeConfig.STAGE}),
+            TABLE(FLATTEN(input => PARSE_JSON(?))) AS f
+            WHERE relative_path = '{relative_path}';
+            """
+            session.sql(insert_query, params=[json.dumps(chunks)]).collect()
+        # Only stored chunks join the index, so a failed upload can be retried
+        deduplicator.commit(folder_path, dedup_report, pending)
+
+        dedup_report["summary"] = queue_summary(
+            session, relative_path, parsed_content.text_content)
+        return dedup_report
 
     finally:
         if os.path.exists(temp_file_path):
@@ -101,6 +127,7 @@ prompt = """
                 "name": "<candidate_name>",
                 "experience": <int>,
                 "projects": <int>,
+                "skills": ["<skill>", ...],
                 "key_achievements": "<key achievements>",
                 "ai_take": "<your assessment of suitable roles for this candidate>"
             },
@@ -119,6 +146,7 @@ prompt = """
                 "name": "Alan Susa",
                 "experience": 7,
                 "projects": 3,
+                "skills": ["Python", "SQL", "Spark"],
                 "key_achievements": "Migrated Oracle to Redshift, saving $678k annually.",
                 "ai_take": "Best suited for Data Engineer or Big Data Developer roles."
             },
@@ -126,6 +154,7 @@ prompt = """
                 "name": "Kaarthik Andavar",
                 "experience": 6,
                 "projects": 4,
+                "skills": ["Python", "SQL"],
                 "key_achievements": "Reduced ML costs by 99.4% via SageMaker migration.",
                 "ai_take": "Great fit for Full-Stack Developer or Data Warehouse Engineer roles."
             }
@@ -165,6 +194,13 @@ def render_sidebar():
         st.markdown("<br>", unsafe_allow_html=True)
 
         if st.button("Reset", key="reset_button"):
+            # Imported here: utils.warmup depends on this module
+            from utils.warmup import cancel_warmup
+            if st.session_state.get("warmup_job") is not None:
+                cancel_warmup(st.session_state.pop("warmup_job"))
+            if st.session_state.get("folder_path"):
+                forget_profiles(st.session_state["folder_path"])
+                evict_folder(st.session_state["folder_path"])
             st.query_params.clear()
             st.session_state["chat_mode"] = False
             st.session_state["uploaded_files"] = []
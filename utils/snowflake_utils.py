@@ -13,6 +13,11 @@ class SnowflakeConfig:
     STAGE: str = "docs"
     SEARCH_SERVICE: str = "sub_zero_search"
     CHUNK_TABLE: str = "chunks_table"
+    SUMMARY_TABLE: str = "resume_summaries"
+    SUMMARY_SEARCH_SERVICE: str = "sub_zero_summary_search"
+    SAMPLE_FOLDER: str = "resume/2025-01-24/ISwfEXWb"
+    RETENTION_DAYS: int = int(st.secrets.get("RETENTION_DAYS", 7))
+    RETENTION_CHECK_INTERVAL: int = 3600
 
 
 class SnowflakeConnection:
@@ -42,11 +47,12 @@ class SnowflakeConnection:
                 f"Could not connect to Snowflake: {str(e)}") from e
 
     @staticmethod
-    def get_search_service(session: Any) -> Any:
+    def get_search_service(session: Any, service_name: str = SnowflakeConfig.SEARCH_SERVICE) -> Any:
         """Get Snowflake search service using provided session.
 
         Args:
             session: Active Snowflake session
+            service_name: Cortex Search service (chunks by default)
 
         Returns:
             search_service: Snowflake search service object
@@ -59,7 +65,7 @@ class SnowflakeConnection:
             search_service = (
                 root.databases[SnowflakeConfig.DATABASE]
                 .schemas[SnowflakeConfig.SCHEMA]
-                .cortex_search_services[SnowflakeConfig.SEARCH_SERVICE]
+                .cortex_search_services[service_name]
             )
             return search_service
         except Exception as e:
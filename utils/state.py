@@ -1,4 +1,5 @@
 import streamlit as st
+from utils.snowflake_utils import SnowflakeConfig
 
 
 class SessionStateManager:
@@ -10,7 +11,7 @@ class SessionStateManager:
         default_states = {
             "chat_mode": False,
             "uploaded_files": [],
-            "default_folder_path": "resume/2025-01-24/ISwfEXWb",
+            "default_folder_path": SnowflakeConfig.SAMPLE_FOLDER,
             "folder_path": None,
             "uploading": False
         }
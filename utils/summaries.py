@@ -0,0 +1,99 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from snowflake.cortex import complete
+from utils.snowflake_utils import SnowflakeConfig
+from utils.governor import get_governor, request_key
+from utils.priority import background_work
+
+logger = logging.getLogger(__name__)
+
+# Summaries are written off the upload path, one at a time, in the
+# governor's background lane so they yield to interactive requests.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summaries")
+_never_cancelled = threading.Event()
+_tier_available = None
+_tier_lock = threading.Lock()
+
+
+@dataclass
+class SummaryConfig:
+    """Per-resume summary tier settings"""
+    MODEL: str = "mistral-large2"
+    MAX_INPUT_CHARS: int = 12000
+    MAX_WORDS: int = 120
+
+
+def summary_prompt(resume_text: str) -> str:
+    return f"""
+        Summarize the resume below as one compact record for a recruiter search index.
+        Use exactly these lines and nothing else:
+        Name: <candidate name>
+        Years of experience: <number>
+        Roles: <most recent roles, comma separated>
+        Skills: <key skills, comma separated>
+        Highlights: <two or three measurable achievements>
+        Keep the whole record under {SummaryConfig.MAX_WORDS} words.
+
+        <resume>
+        {resume_text[:SummaryConfig.MAX_INPUT_CHARS]}
+        </resume>
+    """
+
+
+def summarize_resume(session, resume_text: str) -> str:
+    """One compact summary record (name, years, roles, skills, highlights) for a resume."""
+    prompt = summary_prompt(resume_text)
+    summary = get_governor().call(
+        SummaryConfig.MODEL,
+        lambda: complete(SummaryConfig.MODEL, prompt, session=session, stream=False),
+        key=request_key(SummaryConfig.MODEL, prompt)
+    )
+    return summary.strip()
+
+
+def store_summary(session, relative_path: str, resume_text: str) -> bool:
+    """Summarize a resume into the summary tier.
+
+    A failure is logged and skipped: retrieval falls back to raw chunks for
+    candidates without a summary.
+    """
+    try:
+        summary = summarize_resume(session, resume_text)
+        session.sql(
+            f"INSERT INTO {SnowflakeConfig.SUMMARY_TABLE} (relative_path, summary) VALUES (?, ?)",
+            params=[relative_path, summary]
+        ).collect()
+        logger.info(f"Stored summary for {relative_path}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to summarize {relative_path}: {str(e)}")
+        return False
+
+
+def summary_tier_available(session) -> bool:
+    """Whether the summary table exists; checked once per process."""
+    global _tier_available
+    with _tier_lock:
+        if _tier_available is None:
+            try:
+                session.sql(f"SELECT 1 FROM {SnowflakeConfig.SUMMARY_TABLE} LIMIT 1").collect()
+                _tier_available = True
+            except Exception as e:
+                logger.warning(f"Summary tier not configured, skipping summaries: {str(e)}")
+                _tier_available = False
+        return _tier_available
+
+
+def queue_summary(session, relative_path: str, resume_text: str) -> bool:
+    """Summarize a resume in the background; False if the summary tier is not configured."""
+    if not summary_tier_available(session):
+        return False
+
+    def run():
+        with background_work(_never_cancelled):
+            store_summary(session, relative_path, resume_text)
+
+    _executor.submit(run)
+    return True
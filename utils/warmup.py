@@ -0,0 +1,100 @@
+import time
+import threading
+import logging
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from typing import Dict, List, Optional
+from utils.insights import fetch_insights, parse_insights_json
+from utils.profiles import CandidateProfiles, register_profiles
+from utils.priority import background_work, wait_for_idle
+
+logger = logging.getLogger(__name__)
+
+# One warm-up step runs at a time per process; interactive work takes priority.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warmup")
+_jobs: Dict[str, "WarmupJob"] = {}
+_jobs_lock = threading.Lock()
+WARM_TTL = 3600
+
+
+class WarmupJob:
+    """Precomputes a folder's insights and standard query answers in the background.
+
+    Every Cortex call a step makes goes through the governor's background
+    lane, so it waits while interactive requests are in flight and the job
+    stops at its next call once cancelled.
+    """
+
+    def __init__(self, folder_path: str, pipeline, queries: List[str], insights_prompt: str):
+        self.folder_path = folder_path
+        self.pipeline = pipeline
+        self.queries = list(queries)
+        self.insights_prompt = insights_prompt
+        self.cancelled = threading.Event()
+        self.status = "pending"
+        self.finished_at = 0.0
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def run(self) -> None:
+        self.status = "running"
+        start = time.perf_counter()
+        steps = [("insights", self._warm_insights)] + [
+            (query, lambda q=query: self.pipeline.answer(q, self.folder_path))
+            for query in self.queries
+        ]
+
+        with background_work(self.cancelled):
+            for name, step in steps:
+                wait_for_idle(self.cancelled)
+                try:
+                    if self.cancelled.is_set():
+                        raise CancelledError()
+                    step()
+                    logger.info(f"Warm-up for {self.folder_path}: finished {name!r}")
+                except CancelledError:
+                    self.status = "cancelled"
+                    logger.info(f"Warm-up for {self.folder_path} cancelled")
+                    return
+                except Exception as e:
+                    logger.error(f"Warm-up step {name!r} failed for {self.folder_path}: {str(e)}")
+
+        self.status = "done"
+        self.finished_at = time.monotonic()
+        logger.info(
+            f"Warm-up for {self.folder_path} done in {time.perf_counter() - start:.1f}s")
+
+    def _warm_insights(self) -> None:
+        response = fetch_insights(
+            self.pipeline.session, self.folder_path, self.insights_prompt)
+        register_profiles(
+            self.folder_path, CandidateProfiles.from_insights(
+                parse_insights_json(response, require_complete=True)))
+
+
+def start_warmup(folder_path: str, pipeline, queries: List[str], insights_prompt: str) -> Optional[WarmupJob]:
+    """Queue a warm-up for a searchable folder unless one is running or recent."""
+    with _jobs_lock:
+        job = _jobs.get(folder_path)
+        if job is not None and (
+            job.status in ("pending", "running")
+            or (job.status == "done" and time.monotonic() - job.finished_at < WARM_TTL)
+        ):
+            return None
+        job = WarmupJob(folder_path, pipeline, queries, insights_prompt)
+        _jobs[folder_path] = job
+    _executor.submit(job.run)
+    logger.info(f"Queued warm-up for {folder_path}")
+    return job
+
+
+def cancel_warmup(job: WarmupJob) -> None:
+    """Stop a warm-up at its next Cortex call.
+
+    Takes the job rather than the folder, so a session only cancels the
+    warm-up it started, never one that other sessions rely on.
+    """
+    with _jobs_lock:
+        if _jobs.get(job.folder_path) is job:
+            del _jobs[job.folder_path]
+    job.cancel()